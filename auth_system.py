@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 from typing import Dict, Set
 
+from persistence import json_writer
+
 class AuthSystem:
     """Simple authentication system for bot access"""
     
@@ -36,16 +38,12 @@ class AuthSystem:
             self.authorized_users = set()
     
     def _save_authorized_users(self):
-        """Save authorized users to file"""
-        try:
-            data = {
-                'authorized_users': list(self.authorized_users),
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.auth_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving authorized users: {e}")
+        """Queue an atomic save of authorized users on the writer thread"""
+        data = {
+            'authorized_users': list(self.authorized_users),
+            'last_updated': datetime.now().isoformat()
+        }
+        json_writer.write(self.auth_file, data)
     
     def is_authorized(self, user_id: int) -> bool:
         """
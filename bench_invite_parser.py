@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: single-pass invite link parser vs. the old regex chains
+Run: python bench_invite_parser.py [iterations]
+"""
+
+import re
+import sys
+import timeit
+
+from utils import parse_invite_link
+
+SAMPLE_LINKS = [
+    "https://t.me/+AbCdEfGhIjKlMnOp",
+    "https://t.me/joinchat/AbCdEfGhIjKlMnOp",
+    "https://telegram.me/joinchat/AbCdEfGhIjKlMnOp",
+    "t.me/+AbCdEfGhIjKlMnOp",
+    "https://t.me/some_public_channel",
+    "@some_public_channel",
+    "some_public_channel",
+    "https://example.com/not-telegram",
+]
+
+def legacy_validate(link):
+    """validate_telegram_invite_link before the parser (regexes rebuilt per call)"""
+    link = link.strip()
+    patterns = [
+        r'^https?://t\.me/\+[a-zA-Z0-9_-]+$',
+        r'^https?://telegram\.me/\+[a-zA-Z0-9_-]+$',
+        r'^https?://t\.me/joinchat/[a-zA-Z0-9_-]+$',
+        r'^https?://telegram\.me/joinchat/[a-zA-Z0-9_-]+$',
+        r'^https?://t\.me/[a-zA-Z0-9_][a-zA-Z0-9_]*$',
+        r'^https?://telegram\.me/[a-zA-Z0-9_][a-zA-Z0-9_]*$',
+        r'^@[a-zA-Z0-9_][a-zA-Z0-9_]*$',
+        r'^[a-zA-Z0-9_][a-zA-Z0-9_]*$',
+    ]
+    for pattern in patterns:
+        if re.match(pattern, link):
+            return True, None
+    if link.startswith('t.me/') or link.startswith('telegram.me/'):
+        return legacy_validate(f"https://{link}")
+    return False, "invalid"
+
+def legacy_extract(link):
+    """extract_invite_hash before the parser"""
+    patterns = [
+        r'https?://t\.me/\+([a-zA-Z0-9_-]+)',
+        r'https?://t\.me/joinchat/([a-zA-Z0-9_-]+)',
+        r'https?://telegram\.me/joinchat/([a-zA-Z0-9_-]+)',
+        r'https?://telegram\.me/\+([a-zA-Z0-9_-]+)',
+        r'https?://t\.me/([a-zA-Z0-9_][a-zA-Z0-9_]*)',
+        r'https?://telegram\.me/([a-zA-Z0-9_][a-zA-Z0-9_]*)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, link)
+        if match:
+            return match.group(1)
+    if link.startswith('@'):
+        return link[1:]
+    if re.match(r'^[a-zA-Z0-9_][a-zA-Z0-9_]*$', link):
+        return link
+    return None
+
+def legacy_join_path(link):
+    """What /join did per link: validate, extract, then classify by substring"""
+    is_valid, _ = legacy_validate(link)
+    if not is_valid:
+        return None
+    invite_hash = legacy_extract(link)
+    is_private = "/joinchat/" in link or "/+" in link
+    return is_private, invite_hash
+
+def parser_join_path(link):
+    """The same work with the single-pass parser"""
+    parsed = parse_invite_link(link)
+    if not parsed.is_valid:
+        return None
+    return parsed.is_private, parsed.value
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    legacy = timeit.timeit(lambda: [legacy_join_path(link) for link in SAMPLE_LINKS], number=iterations)
+    parser = timeit.timeit(lambda: [parser_join_path(link) for link in SAMPLE_LINKS], number=iterations)
+    calls = iterations * len(SAMPLE_LINKS)
+
+    print(f"Links per run: {len(SAMPLE_LINKS)}, runs: {iterations}")
+    print(f"Legacy validate+extract: {legacy / calls * 1e6:.2f} us/link")
+    print(f"Single-pass parser:      {parser / calls * 1e6:.2f} us/link")
+    print(f"Speedup: {legacy / parser:.1f}x")
+
+    if parser >= legacy:
+        print("❌ Parser is not faster than the legacy implementation")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import cost of the bot entry point
+Runs `python -X importtime -c "import main"` in fresh interpreters, reports the heaviest imports and checks a budget
+Run: python bench_startup.py [--runs N] [--budget MS] [--module main]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Import time of main.py allowed on a warm .pyc cache (milliseconds)
+DEFAULT_BUDGET_MS = 500
+
+# Loaded on the first private /join, never at startup
+LAZY_MODULES = ("telethon", "hybrid_autojoin", "membership_index", "session_store")
+
+def measure(module: str, workdir: str):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        list: (name, self_ms, cumulative_ms, depth) per imported module
+    """
+    env = dict(os.environ, PYTHONPATH=HERE)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(f"❌ import {module} failed")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return entries
+
+def direct_imports(entries: list, module: str) -> list:
+    """Modules imported directly by `module` (importtime lists children before their parent)"""
+    children = []
+    for entry in entries:
+        name, _, _, depth = entry
+        if depth == 0:
+            if name == module:
+                return children
+            children = []
+        elif depth == 1:
+            children.append(entry)
+    return children
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs after one warm-up run")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="Budget in milliseconds")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    args = parser.parse_args()
+
+    # main.py creates its state files (chat storage, broadcast runs) in the working directory
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as workdir:
+        measure(args.module, workdir)  # warm-up: writes .pyc files
+        runs = [measure(args.module, workdir) for _ in range(max(1, args.runs))]
+
+    totals = [next(cumulative for name, _, cumulative, depth in entries if name == args.module and depth == 0)
+              for entries in runs]
+    median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    print(f"import {args.module}: median {statistics.median(totals):.1f} ms "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, {len(totals)} runs)")
+
+    print(f"\nHeaviest direct imports (median run, cumulative ms):")
+    heaviest = sorted(direct_imports(median_run, args.module), key=lambda entry: entry[2], reverse=True)
+    for name, _, cumulative, _ in heaviest[:args.top]:
+        print(f"  {cumulative:8.1f}  {name}")
+
+    loaded = sorted({name.split(".")[0] for name, _, _, _ in median_run} & set(LAZY_MODULES))
+    failed = False
+    if loaded:
+        print(f"\n❌ Lazy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if statistics.median(totals) > args.budget:
+        print(f"\n❌ Over budget: {statistics.median(totals):.1f} ms > {args.budget:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n✅ Within budget ({args.budget:.0f} ms), no lazy modules imported")
+
+if __name__ == "__main__":
+    main()
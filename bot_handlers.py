@@ -3,15 +3,19 @@ Bot command handlers for Telegram Auto-Join Bot
 Simplified and realistic approach for auto-join functionality
 """
 
+import asyncio
 import logging
 import sys
 import os
+import time
+from collections import Counter
+from datetime import datetime
 
 # Add current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from telegram import Update
+    from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
     from telegram.ext import ContextTypes
     from telegram.error import TelegramError, BadRequest, Forbidden, TimedOut
 except ImportError as e:
@@ -21,14 +25,55 @@ except ImportError as e:
         from telegram.ext import ContextTypes
         from telegram.error import TelegramError, BadRequest, Forbidden, TimedOut
         Update = telegram.Update
+        InlineKeyboardButton = telegram.InlineKeyboardButton
+        InlineKeyboardMarkup = telegram.InlineKeyboardMarkup
     except ImportError as e2:
         print(f"Failed to import telegram: {e2}")
         sys.exit(1)
 
-from utils import validate_telegram_invite_link, extract_invite_hash, log_join_attempt, format_help_message, log_broadcast_attempt
+from utils import parse_invite_link, parse_link_list, INVALID_LINK_MESSAGE, log_join_attempt, format_help_message, log_broadcast_attempt
 from chat_storage import chat_storage
+from chat_list import chat_list_pager
+from invite_cache import invite_cache
+from config import (
+    BROADCAST_CHECKPOINT_SIZE,
+    BULK_JOIN_MAX_LINKS,
+    BULK_JOIN_MAX_FILE_SIZE,
+    BULK_JOIN_PROGRESS_INTERVAL,
+    JOIN_INTERACTIVE_MAX_WAIT,
+)
+from broadcast_engine import BroadcastEngine
+from progress import ProgressReporter, format_duration
+from chat_health import (
+    chat_health,
+    FAILURE_FORBIDDEN,
+    FAILURE_NOT_FOUND,
+    FAILURE_MIGRATED,
+    FAILURE_OTHER,
+    ACTION_PRUNED,
+    ACTION_MIGRATED,
+)
+from broadcast_runs import (
+    broadcast_runs,
+    RUN_RUNNING,
+    RUN_DONE,
+    RUN_INTERRUPTED,
+    DELIVERY_PENDING,
+    DELIVERY_SENT,
+    DELIVERY_FAILED,
+)
+from jobs import (
+    job_registry,
+    JOB_BROADCAST,
+    JOB_BULK_JOIN,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_CANCELLED,
+)
 from auth_system import AuthSystem
-from hybrid_autojoin import hybrid_autojoin, setup_hybrid_system, join_with_user_account
+from user_account import is_user_configured, get_hybrid_autojoin
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +118,312 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     help_text = format_help_message()
     await update.message.reply_text(help_text)
 
+def _user_join_response(result: dict) -> dict:
+    """
+    Turn a user-account join result into the reply for the user
+    
+    Args:
+        result (dict): Result of join_group_with_user (or its cached copy)
+        
+    Returns:
+        dict: 'success', 'text' and 'detail' as returned by _process_join_link
+    """
+    if result['success']:
+        group_info = result['group_info']
+        return {
+            'success': True,
+            'detail': "Successfully joined using user account",
+            'text': (
+                "✅ BERHASIL AUTO-JOIN!\n\n"
+                f"Grup: {group_info['title']}\n"
+                f"Type: {group_info['type'].title()}\n"
+                f"ID: {group_info['id']}\n"
+                f"Members: {group_info.get('participants_count', 'N/A')}\n\n"
+                "🎉 Sekarang bot dapat broadcast ke grup ini!\n"
+                f"Total chat tersimpan: {chat_storage.get_chat_count()}"
+            )
+        }
+    
+    return {
+        'success': False,
+        'detail': result['error'],
+        'text': (
+            f"❌ Gagal bergabung!\n\n"
+            f"Error: {result['error']}\n\n"
+            "Kemungkinan penyebab:\n"
+            "• Link invite sudah kedaluwarsa\n"
+            "• Link invite tidak valid\n"
+            "• Sudah menjadi anggota\n"
+            "• Rate limit dari Telegram\n\n"
+            "Coba lagi dengan link yang baru atau tunggu beberapa menit."
+        )
+    }
+
+async def _process_join_link(context: ContextTypes.DEFAULT_TYPE, invite_link: str, parsed_link, progress=None,
+                             max_wait: float = None) -> dict:
+    """
+    Resolve and join a single validated link
+    
+    Args:
+        context: Handler context (used for Bot API lookups)
+        invite_link (str): Link as given by the user
+        parsed_link (InviteLink): Result of parse_invite_link(invite_link)
+        progress: Optional coroutine function called with intermediate status text
+        max_wait (float, optional): Longest join pacer wait before the link is
+            reported as rate limited; None waits (bulk join)
+        
+    Returns:
+        dict: 'success', 'text' (final message for the user) and
+            'detail' (reason for the join attempt log)
+    """
+    async def report(text: str):
+        if progress:
+            await progress(text)
+    
+    # Invite hash (private link) or username (public link)
+    invite_hash = parsed_link.value
+    
+    # Handle different link types
+    if parsed_link.is_private:
+        # Link yang sama sudah pernah dicoba: jawab dari cache tanpa setup
+        # atau koneksi user account
+        cached = invite_cache.get(invite_hash)
+        if cached is not None:
+            cached['link'] = invite_link
+            cached['cached'] = True
+            logger.info(f"Invite result served from cache: {invite_hash} ({cached.get('outcome')})")
+            return _user_join_response(cached)
+        
+        # Private group invite link - gunakan user account
+        await report(
+            "🔄 Mencoba bergabung menggunakan user account...\n\n"
+            f"Link: {invite_link}\n"
+            f"Hash: {invite_hash}\n\n"
+            "⚙️ Menggunakan sistem hybrid untuk auto-join private group..."
+        )
+        
+        # Cek apakah user account sudah setup
+        if not is_user_configured():
+            return {
+                'success': False,
+                'detail': "User account not configured",
+                'text': (
+                    "❌ User Account Belum Dikonfigurasi!\n\n"
+                    "Untuk auto-join ke private group, diperlukan setup user account.\n\n"
+                    "📋 Cara Setup:\n"
+                    "1. Jalankan: python hybrid_autojoin.py\n"
+                    "2. Masukkan API ID dan API Hash dari my.telegram.org\n"
+                    "3. Verifikasi dengan: python verify_user_account.py\n"
+                    "4. Restart bot\n\n"
+                    "Setelah setup, bot dapat auto-join ke private group!"
+                )
+            }
+        
+        # Telethon dimuat saat pertama kali dibutuhkan, lalu setup user account jika belum
+        hybrid_autojoin = await get_hybrid_autojoin()
+        if not await hybrid_autojoin.ensure_ready():
+            return {
+                'success': False,
+                'detail': "Failed to setup user account",
+                'text': (
+                    "❌ Gagal setup user account!\n\n"
+                    "Kemungkinan masalah:\n"
+                    "• Session expired\n"
+                    "• API credentials tidak valid\n"
+                    "• Akun tidak ter-authorize\n\n"
+                    "Jalankan lagi: python verify_user_account.py"
+                )
+            }
+        
+        # Join menggunakan user account
+        await report(
+            "🚀 Bergabung ke private group...\n\n"
+            "Menggunakan user account untuk auto-join..."
+        )
+        
+        result = await hybrid_autojoin.join_group_with_user(invite_link, max_wait)
+        return _user_join_response(result)
+    
+    # Public username format
+    try:
+        # Try to get chat information
+        chat = await context.bot.get_chat(f"@{invite_hash}")
+    except Exception as chat_error:
+        return {
+            'success': False,
+            'detail': f"Chat not found: {str(chat_error)}",
+            'text': (
+                f"❌ Chat tidak ditemukan!\n\n"
+                f"Username: @{invite_hash}\n"
+                f"Error: {str(chat_error)}\n\n"
+                "Kemungkinan penyebab:\n"
+                "• Username salah atau tidak ada\n"
+                "• Chat bersifat private\n"
+                "• Chat telah dihapus\n\n"
+                "Periksa kembali link yang Anda berikan."
+            )
+        }
+    
+    # Check if bot is already a member
+    try:
+        member = await context.bot.get_chat_member(chat.id, context.bot.id)
+    except Exception as member_error:
+        return {
+            'success': False,
+            'detail': f"Cannot check membership: {str(member_error)}",
+            'text': (
+                f"⚠️ Tidak dapat mengecek status keanggotaan!\n\n"
+                f"Chat: {chat.title}\n"
+                f"Error: {str(member_error)}\n\n"
+                "Kemungkinan:\n"
+                "1. Bot belum ditambahkan ke grup/channel\n"
+                "2. Grup/channel bersifat restricted\n"
+                "3. Bot tidak memiliki akses\n\n"
+                "Tambahkan bot sebagai anggota biasa dan coba lagi."
+            )
+        }
+    
+    if member.status in ['member', 'administrator', 'creator']:
+        # Bot is already a member
+        if not chat_storage.is_chat_stored(chat.id):
+            chat_storage.add_chat(
+                chat_id=chat.id,
+                chat_title=chat.title or f"Chat {chat.id}",
+                chat_type=chat.type,
+                invite_link=invite_link
+            )
+        
+        return {
+            'success': True,
+            'detail': None,
+            'text': (
+                "✅ Bot sudah menjadi anggota!\n\n"
+                f"Grup/Channel: {chat.title}\n"
+                f"Type: {chat.type.title()}\n"
+                f"ID: {chat.id}\n\n"
+                "✅ Disimpan untuk broadcast!\n"
+                f"Total chat tersimpan: {chat_storage.get_chat_count()}"
+            )
+        }
+    
+    # Bot is not a member
+    return {
+        'success': False,
+        'detail': "Bot not a member of public chat",
+        'text': (
+            f"❌ Bot belum menjadi anggota!\n\n"
+            f"Chat: {chat.title}\n"
+            f"Type: {chat.type.title()}\n"
+            f"Username: @{invite_hash}\n\n"
+            "🔧 Untuk public chat/channel:\n"
+            "1. Buka chat tersebut secara manual\n"
+            "2. Tambahkan bot sebagai anggota\n"
+            "3. Atau minta admin untuk menambahkan bot\n\n"
+            "Bot tidak dapat bergabung otomatis ke public chat."
+        )
+    }
+
+async def _run_bulk_join(context: ContextTypes.DEFAULT_TYPE, progress_msg, user_id: int, username: str,
+                         links: list, invalid_count: int, duplicate_count: int) -> None:
+    """
+    Background job processing a list of links with pacing
+    
+    User-account joins are spaced by the adaptive join pacer. Edits a single
+    progress message in place, at most once every
+    BULK_JOIN_PROGRESS_INTERVAL seconds, and finishes with a summary.
+    On /cancel the links processed so far are reported and the rest skipped.
+    """
+    total = len(links)
+    success_count = 0
+    failed = []
+    last_edit = 0.0
+    processed = 0
+    
+    def summary(done: int) -> str:
+        return (
+            f"Bulk join: {done}/{total} link diproses\n\n"
+            f"✅ Berhasil: {success_count}\n"
+            f"❌ Gagal: {len(failed)}\n"
+            f"🔁 Duplikat dilewati: {duplicate_count}\n"
+            f"⚠️ Format tidak valid: {invalid_count}"
+        )
+    
+    try:
+        for index, parsed_link in enumerate(links, 1):
+            invite_link = parsed_link.link
+            try:
+                result = await _process_join_link(context, invite_link, parsed_link)
+            except Exception as e:
+                logger.error(f"Error in bulk join for {invite_link}: {e}")
+                result = {'success': False, 'detail': f"System error: {str(e)}"}
+            
+            log_join_attempt(user_id, username, invite_link, result['success'], result['detail'])
+            processed = index
+            if result['success']:
+                success_count += 1
+            else:
+                failed.append((invite_link, result['detail']))
+            
+            now = time.monotonic()
+            if index < total and now - last_edit >= BULK_JOIN_PROGRESS_INTERVAL:
+                last_edit = now
+                try:
+                    await progress_msg.edit_text(f"⏳ {summary(index)}")
+                except TelegramError as e:
+                    logger.warning(f"Could not update bulk join progress: {e}")
+    except asyncio.CancelledError:
+        try:
+            await progress_msg.edit_text(f"🛑 Dibatalkan - {summary(processed)}")
+        except TelegramError as e:
+            logger.warning(f"Could not send bulk join summary: {e}")
+        raise
+    
+    final_text = f"🏁 {summary(total)}"
+    if failed:
+        final_text += "\n\nGagal:\n" + "\n".join(f"• {link} - {reason}" for link, reason in failed[:10])
+        if len(failed) > 10:
+            final_text += f"\n... dan {len(failed) - 10} lainnya"
+    
+    try:
+        await progress_msg.edit_text(final_text[:4000])
+    except TelegramError as e:
+        logger.warning(f"Could not send bulk join summary: {e}")
+
+async def _start_bulk_join(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+    """Parse, deduplicate and queue links for a background bulk join"""
+    user = update.effective_user
+    username = user.username or user.first_name
+    
+    links, invalid_count, duplicate_count = parse_link_list(text)
+    
+    if not links:
+        await update.message.reply_text(
+            "❌ Tidak ada link valid yang ditemukan!\n\n"
+            "Kirim satu link per baris, atau upload file .txt/.csv berisi link."
+        )
+        return
+    
+    if len(links) > BULK_JOIN_MAX_LINKS:
+        await update.message.reply_text(
+            f"❌ Terlalu banyak link ({len(links)})!\n\n"
+            f"Maksimal {BULK_JOIN_MAX_LINKS} link per bulk join."
+        )
+        return
+    
+    job = job_registry.new_job(JOB_BULK_JOIN, f"Bulk join {len(links)} link", user.id)
+    job.message = await update.message.reply_text(
+        f"📥 {len(links)} link diantrikan untuk bulk join (job #{job.id})...\n\n"
+        f"🔁 Duplikat dilewati: {duplicate_count}\n"
+        f"⚠️ Format tidak valid: {invalid_count}\n\n"
+        f"Batalkan dengan: /cancel {job.id}"
+    )
+    
+    logger.info(f"User {username}({user.id}) queued bulk join of {len(links)} links as job #{job.id}")
+    job_registry.start(
+        job,
+        lambda job: _run_bulk_join(context, job.message, user.id, username, links, invalid_count, duplicate_count)
+    )
+
 async def join_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /join command - Realistic approach for bot limitations"""
     user = update.effective_user
@@ -98,21 +449,26 @@ async def join_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         )
         return
     
+    # Several links (one per line) are handled as a bulk join
+    if len(message_text.split()) > 2:
+        await _start_bulk_join(update, context, message_text.split(None, 1)[1])
+        return
+    
     # Get the invite link from the message
-    invite_link = " ".join(message_text.split()[1:])
+    invite_link = message_text.split()[1]
     
-    # Validate the invite link
-    is_valid, error_msg = validate_telegram_invite_link(invite_link)
+    # Parse and validate the invite link in one pass
+    parsed_link = parse_invite_link(invite_link)
     
-    if not is_valid:
+    if not parsed_link.is_valid:
         await update.message.reply_text(
             f"❌ Link tidak valid!\n\n"
-            f"Error: {error_msg}\n\n"
+            f"Error: {INVALID_LINK_MESSAGE}\n\n"
             "Pastikan menggunakan format link yang benar:\n"
             "• https://t.me/+abc123\n"
             "• https://t.me/joinchat/abc123"
         )
-        log_join_attempt(user_id, username, invite_link, False, error_msg or "Invalid link")
+        log_join_attempt(user_id, username, invite_link, False, INVALID_LINK_MESSAGE)
         return
     
     # Send processing message
@@ -122,167 +478,10 @@ async def join_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     )
     
     try:
-        # Extract invite hash or username
-        invite_hash = extract_invite_hash(invite_link)
-        
-        # Handle different link types
-        if "/joinchat/" in invite_link or "/+" in invite_link:
-            # Private group invite link - gunakan user account
-            await processing_msg.edit_text(
-                "🔄 Mencoba bergabung menggunakan user account...\n\n"
-                f"Link: {invite_link}\n"
-                f"Hash: {invite_hash}\n\n"
-                "⚙️ Menggunakan sistem hybrid untuk auto-join private group..."
-            )
-            
-            # Cek apakah user account sudah setup
-            if not hybrid_autojoin.is_user_configured():
-                await processing_msg.edit_text(
-                    "❌ User Account Belum Dikonfigurasi!\n\n"
-                    "Untuk auto-join ke private group, diperlukan setup user account.\n\n"
-                    "📋 Cara Setup:\n"
-                    "1. Jalankan: python hybrid_autojoin.py\n"
-                    "2. Masukkan API ID dan API Hash dari my.telegram.org\n"
-                    "3. Verifikasi dengan: python verify_user_account.py\n"
-                    "4. Restart bot\n\n"
-                    "Setelah setup, bot dapat auto-join ke private group!"
-                )
-                log_join_attempt(user_id, username, invite_link, False, "User account not configured")
-                return
-            
-            # Setup user account jika belum
-            if not await setup_hybrid_system():
-                await processing_msg.edit_text(
-                    "❌ Gagal setup user account!\n\n"
-                    "Kemungkinan masalah:\n"
-                    "• Session expired\n"
-                    "• API credentials tidak valid\n"
-                    "• Akun tidak ter-authorize\n\n"
-                    "Jalankan lagi: python verify_user_account.py"
-                )
-                log_join_attempt(user_id, username, invite_link, False, "Failed to setup user account")
-                return
-            
-            # Join menggunakan user account
-            await processing_msg.edit_text(
-                "🚀 Bergabung ke private group...\n\n"
-                "Menggunakan user account untuk auto-join..."
-            )
-            
-            result = await join_with_user_account(invite_link)
-            
-            if result['success']:
-                group_info = result['group_info']
-                await processing_msg.edit_text(
-                    "✅ BERHASIL AUTO-JOIN!\n\n"
-                    f"Grup: {group_info['title']}\n"
-                    f"Type: {group_info['type'].title()}\n"
-                    f"ID: {group_info['id']}\n"
-                    f"Members: {group_info.get('participants_count', 'N/A')}\n\n"
-                    "🎉 Sekarang bot dapat broadcast ke grup ini!\n"
-                    f"Total chat tersimpan: {chat_storage.get_chat_count()}"
-                )
-                log_join_attempt(user_id, username, invite_link, True, "Successfully joined using user account")
-            else:
-                await processing_msg.edit_text(
-                    f"❌ Gagal bergabung!\n\n"
-                    f"Error: {result['error']}\n\n"
-                    "Kemungkinan penyebab:\n"
-                    "• Link invite sudah kedaluwarsa\n"
-                    "• Link invite tidak valid\n"
-                    "• Sudah menjadi anggota\n"
-                    "• Rate limit dari Telegram\n\n"
-                    "Coba lagi dengan link yang baru atau tunggu beberapa menit."
-                )
-                log_join_attempt(user_id, username, invite_link, False, result['error'])
-            return
-        
-        elif invite_hash and not ("/" in invite_hash):
-            # Public username format
-            try:
-                # Try to get chat information
-                chat = await context.bot.get_chat(f"@{invite_hash}")
-                
-                # Check if bot is already a member
-                try:
-                    member = await context.bot.get_chat_member(chat.id, context.bot.id)
-                    if member.status in ['member', 'administrator', 'creator']:
-                        # Bot is already a member
-                        if not chat_storage.is_chat_stored(chat.id):
-                            chat_storage.add_chat(
-                                chat_id=chat.id,
-                                chat_title=chat.title or f"Chat {chat.id}",
-                                chat_type=chat.type,
-                                invite_link=invite_link
-                            )
-                        
-                        await processing_msg.edit_text(
-                            "✅ Bot sudah menjadi anggota!\n\n"
-                            f"Grup/Channel: {chat.title}\n"
-                            f"Type: {chat.type.title()}\n"
-                            f"ID: {chat.id}\n\n"
-                            "✅ Disimpan untuk broadcast!\n"
-                            f"Total chat tersimpan: {chat_storage.get_chat_count()}"
-                        )
-                        log_join_attempt(user_id, username, invite_link, True)
-                        return
-                    else:
-                        # Bot is not a member
-                        await processing_msg.edit_text(
-                            f"❌ Bot belum menjadi anggota!\n\n"
-                            f"Chat: {chat.title}\n"
-                            f"Type: {chat.type.title()}\n"
-                            f"Username: @{invite_hash}\n\n"
-                            "🔧 Untuk public chat/channel:\n"
-                            "1. Buka chat tersebut secara manual\n"
-                            "2. Tambahkan bot sebagai anggota\n"
-                            "3. Atau minta admin untuk menambahkan bot\n\n"
-                            "Bot tidak dapat bergabung otomatis ke public chat."
-                        )
-                        log_join_attempt(user_id, username, invite_link, False, "Bot not a member of public chat")
-                        return
-                        
-                except Exception as member_error:
-                    await processing_msg.edit_text(
-                        f"⚠️ Tidak dapat mengecek status keanggotaan!\n\n"
-                        f"Chat: {chat.title}\n"
-                        f"Error: {str(member_error)}\n\n"
-                        "Kemungkinan:\n"
-                        "1. Bot belum ditambahkan ke grup/channel\n"
-                        "2. Grup/channel bersifat restricted\n"
-                        "3. Bot tidak memiliki akses\n\n"
-                        "Tambahkan bot sebagai anggota biasa dan coba lagi."
-                    )
-                    log_join_attempt(user_id, username, invite_link, False, f"Cannot check membership: {str(member_error)}")
-                    return
-                    
-            except Exception as chat_error:
-                await processing_msg.edit_text(
-                    f"❌ Chat tidak ditemukan!\n\n"
-                    f"Username: @{invite_hash}\n"
-                    f"Error: {str(chat_error)}\n\n"
-                    "Kemungkinan penyebab:\n"
-                    "• Username salah atau tidak ada\n"
-                    "• Chat bersifat private\n"
-                    "• Chat telah dihapus\n\n"
-                    "Periksa kembali link yang Anda berikan."
-                )
-                log_join_attempt(user_id, username, invite_link, False, f"Chat not found: {str(chat_error)}")
-                return
-        
-        else:
-            # Invalid or unsupported link format
-            await processing_msg.edit_text(
-                "❌ Format link tidak didukung!\n\n"
-                f"Link: {invite_link}\n\n"
-                "Format yang didukung:\n"
-                "• https://t.me/username (public chat)\n"
-                "• https://t.me/+hash (private invite)\n"
-                "• https://t.me/joinchat/hash (private invite)\n\n"
-                "Periksa kembali format link Anda."
-            )
-            log_join_attempt(user_id, username, invite_link, False, "Unsupported link format")
-            return
+        result = await _process_join_link(context, invite_link, parsed_link, progress=processing_msg.edit_text,
+                                          max_wait=JOIN_INTERACTIVE_MAX_WAIT)
+        await processing_msg.edit_text(result['text'])
+        log_join_attempt(user_id, username, invite_link, result['success'], result['detail'])
             
     except Exception as e:
         logger.error(f"Critical error in join command: {e}")
@@ -299,8 +498,299 @@ async def join_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         log_join_attempt(user_id, username, invite_link, False, f"System error: {str(e)}")
         return
 
+async def join_document_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle an uploaded .txt/.csv file of invite links as a bulk join"""
+    user = update.effective_user
+    user_id = user.id
+    username = user.username or user.first_name
+    document = update.message.document
+    
+    logger.info(f"User {username}({user_id}) uploaded link file {document.file_name}")
+    
+    # Check if user is authorized
+    if not auth_system.is_authorized(user_id):
+        await update.message.reply_text(auth_system.get_unauthorized_message())
+        return
+    
+    if document.file_size and document.file_size > BULK_JOIN_MAX_FILE_SIZE:
+        await update.message.reply_text(
+            f"❌ File terlalu besar!\n\n"
+            f"Maksimal {BULK_JOIN_MAX_FILE_SIZE // 1024} KB."
+        )
+        return
+    
+    try:
+        file = await document.get_file()
+        content = await file.download_as_bytearray()
+    except TelegramError as e:
+        logger.error(f"Failed to download link file: {e}")
+        await update.message.reply_text("❌ Gagal mengunduh file. Coba lagi nanti.")
+        return
+    
+    await _start_bulk_join(update, context, bytes(content).decode('utf-8', errors='ignore'))
+
+def _preview(text: str, limit: int) -> str:
+    """Shorten a broadcast message for status texts"""
+    return f"{text[:limit]}{'...' if len(text) > limit else ''}"
+
+async def _run_broadcast(context: ContextTypes.DEFAULT_TYPE, run_id: int, chats: list,
+                         broadcast_message: str, status_msg) -> dict:
+    """
+    Deliver a broadcast run to the given chats and record per-chat state
+    
+    The status message shows live counts, rate and ETA, edited at most once
+    every BROADCAST_PROGRESS_INTERVAL seconds. Failures are classified and
+    dead chats are pruned or migrated through chat_health.
+    
+    Args:
+        context: Callback context
+        run_id (int): Broadcast run ID
+        chats (list): Chat dicts still to deliver to
+        broadcast_message (str): Message text
+        status_msg: Message to edit with the final result
+        
+    Returns:
+        dict: Counts of 'success' and 'failed' deliveries
+    """
+    delivered_chat_ids = []
+    broadcast_time = datetime.now()
+    
+    # Broadcast to all chats concurrently within Telegram's rate limits
+    engine = BroadcastEngine(
+        lambda chat_id: context.bot.send_message(chat_id=chat_id, text=broadcast_message)
+    )
+    
+    run = broadcast_runs.get_run(run_id)
+    reporter = ProgressReporter(
+        status_msg,
+        total=run['total'],
+        title=f"📤 Broadcast #{run_id} berjalan...",
+        footer=f"Pesan: {_preview(broadcast_message, 50)}",
+        bucket=engine.bucket,
+        done=run['total'] - len(chats)
+    )
+    
+    failure_kinds = Counter()
+    actions = Counter()
+    
+    def on_result(chat_info, success, error):
+        nonlocal delivered_chat_ids
+        reporter.record(success)
+        broadcast_runs.record(run_id, chat_info['chat_id'], success, str(error) if error else None)
+        if success:
+            chat_health.record_success(chat_info['chat_id'])
+            delivered_chat_ids.append(chat_info['chat_id'])
+            logger.info(f"Broadcast sent to {chat_info['title']} ({chat_info['chat_id']})")
+        else:
+            kind, action = chat_health.record_failure(chat_info, error)
+            failure_kinds[kind] += 1
+            if action:
+                actions[action] += 1
+            logger.warning(f"Failed to send broadcast to {chat_info['title']} ({chat_info['chat_id']}) [{kind}]: {error}")
+        
+        # Commit timestamps in checkpoints instead of once per chat
+        if len(delivered_chat_ids) >= BROADCAST_CHECKPOINT_SIZE:
+            chat_storage.update_last_broadcast_many(delivered_chat_ids, broadcast_time)
+            delivered_chat_ids = []
+    
+    reporter.start()
+    try:
+        counts = await engine.run(chats, on_result)
+    finally:
+        await reporter.stop()
+        chat_storage.update_last_broadcast_many(delivered_chat_ids, broadcast_time)
+        broadcast_runs.flush()
+    broadcast_runs.set_state(run_id, RUN_DONE)
+    
+    progress = broadcast_runs.progress(run_id)
+    text = (
+        f"📊 Hasil Broadcast #{run_id}:\n\n"
+        f"✅ Berhasil: {progress[DELIVERY_SENT]}\n"
+        f"❌ Gagal: {progress[DELIVERY_FAILED]}\n"
+        f"📋 Total: {sum(progress.values())}\n"
+        f"⏱️ Durasi: {format_duration(reporter.elapsed())}\n"
+    )
+    if failure_kinds:
+        text += "\n" + _format_failure_breakdown(failure_kinds, actions)
+    text += f"\nPesan: {_preview(broadcast_message, 100)}"
+    try:
+        await status_msg.edit_text(text)
+    except TelegramError as e:
+        logger.warning(f"Could not update broadcast result: {e}")
+    return counts
+
+async def _broadcast_job(context: ContextTypes.DEFAULT_TYPE, status_msg, user,
+                         broadcast_message: str = None, run_id: int = None) -> None:
+    """
+    Background job delivering a new broadcast, or resuming run_id
+    
+    Target chats are read when the job starts rather than when it was
+    queued. When the job is cancelled or fails before the run is done, the
+    run is marked interrupted, so /bc resume continues with the chats that
+    were not attempted yet.
+    """
+    if run_id is None:
+        chats = chat_storage.get_all_chats()
+        if not chats:
+            await status_msg.edit_text("❌ Tidak ada chat tersimpan!")
+            return
+        run_id = broadcast_runs.create_run(user.id, broadcast_message, [chat['chat_id'] for chat in chats])
+        start_text = f"📤 Memulai broadcast #{run_id} ke {len(chats)} chat..."
+    else:
+        broadcast_message = broadcast_runs.get_run(run_id)['message']
+        pending_ids = broadcast_runs.pending_chat_ids(run_id)
+        if not pending_ids:
+            await status_msg.edit_text(f"✅ Broadcast #{run_id} sudah terkirim ke semua chat.")
+            return
+        
+        # Chat yang sudah dihapus dari storage tidak bisa dikirimi lagi
+        chats = []
+        for chat_id in pending_ids:
+            chat_info = chat_storage.get_chat(chat_id)
+            if chat_info is None:
+                broadcast_runs.record(run_id, chat_id, False, "Chat removed from storage")
+            else:
+                chats.append(chat_info)
+        broadcast_runs.set_state(run_id, RUN_RUNNING)
+        start_text = f"📤 Melanjutkan broadcast #{run_id} ke {len(chats)} chat yang belum terkirim..."
+        logger.info(f"Resuming broadcast run {run_id}: {len(chats)} chats pending")
+    
+    try:
+        try:
+            await status_msg.edit_text(f"{start_text}\n\nPesan: {_preview(broadcast_message, 50)}")
+        except TelegramError as e:
+            # The status message may have been deleted; deliver anyway
+            logger.warning(f"Could not update broadcast status: {e}")
+        counts = await _run_broadcast(context, run_id, chats, broadcast_message, status_msg)
+    except asyncio.CancelledError:
+        broadcast_runs.set_state(run_id, RUN_INTERRUPTED)
+        progress = broadcast_runs.progress(run_id)
+        try:
+            await status_msg.edit_text(
+                f"🛑 Broadcast #{run_id} dibatalkan.\n\n"
+                f"✅ Terkirim: {progress[DELIVERY_SENT]}\n"
+                f"❌ Gagal: {progress[DELIVERY_FAILED]}\n"
+                f"⏳ Belum dikirim: {progress[DELIVERY_PENDING]}\n\n"
+                f"Lanjutkan dengan: /bc resume {run_id}"
+            )
+        except TelegramError as e:
+            logger.warning(f"Could not update cancelled broadcast status: {e}")
+        raise
+    finally:
+        # Any exit before the run was marked done must leave it resumable
+        run = broadcast_runs.get_run(run_id)
+        if run is not None and run['state'] == RUN_RUNNING:
+            broadcast_runs.set_state(run_id, RUN_INTERRUPTED)
+    
+    log_broadcast_attempt(user.id, user.username or user.first_name, broadcast_message,
+                          counts['success'], counts['failed'])
+
+FAILURE_LABELS = {
+    FAILURE_FORBIDDEN: "🚫 Bot dikeluarkan/diblokir",
+    FAILURE_NOT_FOUND: "🗑️ Chat tidak ditemukan",
+    FAILURE_MIGRATED: "🔀 Pindah ke supergroup",
+    FAILURE_OTHER: "⚠️ Lainnya",
+}
+
+def _format_failure_breakdown(failure_kinds: Counter, actions: Counter) -> str:
+    """Failure classes and prune/migrate actions of a broadcast"""
+    lines = ["Rincian gagal:"]
+    lines += [f"{FAILURE_LABELS[kind]}: {count}" for kind, count in failure_kinds.items()]
+    if actions[ACTION_PRUNED]:
+        lines.append(f"🧹 Dihapus dari storage: {actions[ACTION_PRUNED]}")
+    if actions[ACTION_MIGRATED]:
+        lines.append(f"🔀 Dipindah ke ID baru: {actions[ACTION_MIGRATED]}")
+    if actions:
+        lines.append("Detail: /bc pruned")
+    return "\n".join(lines) + "\n"
+
+def _format_pruned_report() -> str:
+    """Recent chats removed or migrated by chat_health"""
+    actions = chat_health.recent_actions(20)
+    if not actions:
+        return "🧹 Belum ada chat yang dihapus atau dipindahkan."
+    
+    lines = ["🧹 Chat yang dihapus/dipindahkan (terbaru):\n"]
+    for entry in actions:
+        title = entry.get('title') or "Unknown"
+        when = entry['at'][:16].replace("T", " ")
+        if entry['action'] == ACTION_MIGRATED:
+            lines.append(f"🔀 {title} ({entry['chat_id']} → {entry['new_chat_id']}) - {when}")
+        else:
+            lines.append(f"🗑️ {title} ({entry['chat_id']}) - {FAILURE_LABELS.get(entry['reason'], entry['reason'])} - {when}")
+    return "\n".join(lines)
+
+def _format_run_status(run: dict) -> str:
+    """Status text of a broadcast run for /bc status"""
+    progress = broadcast_runs.progress(run['id'])
+    done = progress[DELIVERY_SENT] + progress[DELIVERY_FAILED]
+    state_labels = {
+        RUN_RUNNING: "🔄 Berjalan",
+        RUN_DONE: "✅ Selesai",
+        RUN_INTERRUPTED: "⚠️ Terputus",
+    }
+    text = (
+        f"📊 Status Broadcast #{run['id']}\n\n"
+        f"Status: {state_labels.get(run['state'], run['state'])}\n"
+        f"Dimulai: {datetime.fromtimestamp(run['created_at']).strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"Progres: {done}/{run['total']}\n"
+        f"✅ Terkirim: {progress[DELIVERY_SENT]}\n"
+        f"❌ Gagal: {progress[DELIVERY_FAILED]}\n"
+        f"⏳ Belum dikirim: {progress[DELIVERY_PENDING]}\n\n"
+        f"Pesan: {_preview(run['message'], 100)}"
+    )
+    if progress[DELIVERY_PENDING] and run['state'] != RUN_RUNNING:
+        text += f"\n\nLanjutkan dengan: /bc resume {run['id']}"
+    return text
+
+async def _broadcast_run_command(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str, args: list) -> None:
+    """Handle /bc status [id] and /bc resume <id>"""
+    run_id = None
+    if args:
+        if not args[0].lstrip('#').isdigit():
+            await update.message.reply_text(f"❌ ID broadcast tidak valid: {args[0]}")
+            return
+        run_id = int(args[0].lstrip('#'))
+    elif action == "resume":
+        await update.message.reply_text("❌ Gunakan format: /bc resume [id]")
+        return
+    
+    run = broadcast_runs.get_run(run_id)
+    if run is None:
+        await update.message.reply_text(
+            "❌ Broadcast tidak ditemukan!" if run_id is not None else "📋 Belum ada broadcast."
+        )
+        return
+    
+    if action == "status":
+        await update.message.reply_text(_format_run_status(run))
+        return
+    
+    if run['state'] == RUN_RUNNING:
+        await update.message.reply_text(f"⏳ Broadcast #{run['id']} masih berjalan.")
+        return
+    
+    if not broadcast_runs.pending_chat_ids(run['id']):
+        await update.message.reply_text(f"✅ Broadcast #{run['id']} sudah terkirim ke semua chat.")
+        return
+    
+    user = update.effective_user
+    job = job_registry.new_job(JOB_BROADCAST, f"Lanjutkan broadcast #{run['id']}", user.id)
+    job.message = await update.message.reply_text(
+        f"📥 Lanjutan broadcast #{run['id']} diantrikan (job #{job.id})...\n\n"
+        f"Pesan: {_preview(run['message'], 50)}\n\n"
+        f"Batalkan dengan: /cancel {job.id}"
+    )
+    job_registry.start(job, lambda job: _broadcast_job(context, job.message, user, run_id=run['id']))
+
 async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /bc command to broadcast messages to all joined groups/channels"""
+    """
+    Handle /bc command to broadcast messages to all joined groups/channels
+    
+    Every broadcast is persisted as a run; /bc status [id] reports its
+    progress and /bc resume <id> continues an interrupted run. /bc pruned
+    lists chats removed or migrated after permanent failures.
+    """
     user = update.effective_user
     user_id = user.id
     username = user.username or user.first_name
@@ -323,13 +813,21 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
     
+    tokens = message_text.split()
+    if tokens[1].lower() == "pruned" and len(tokens) == 2:
+        await update.message.reply_text(_format_pruned_report())
+        return
+    if tokens[1].lower() in ("status", "resume") and len(tokens) <= 3:
+        await _broadcast_run_command(update, context, tokens[1].lower(), tokens[2:])
+        return
+    
     # Extract broadcast message
-    broadcast_message = " ".join(message_text.split()[1:])
+    broadcast_message = " ".join(tokens[1:])
     
-    # Get all stored chats
-    all_chats = chat_storage.get_all_chats()
+    # Check stored chats
+    chat_count = chat_storage.get_chat_count()
     
-    if not all_chats:
+    if not chat_count:
         await update.message.reply_text(
             "❌ Tidak ada chat tersimpan!\n\n"
             "Gunakan /join untuk bergabung ke grup/channel terlebih dahulu.\n"
@@ -337,39 +835,88 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
     
-    # Send status message
-    status_msg = await update.message.reply_text(
-        f"📤 Memulai broadcast ke {len(all_chats)} chat...\n\n"
-        f"Pesan: {broadcast_message[:50]}{'...' if len(broadcast_message) > 50 else ''}"
+    # The delivery runs as a background job; this handler returns right away
+    job = job_registry.new_job(JOB_BROADCAST, f"Broadcast ke {chat_count} chat", user_id)
+    job.message = await update.message.reply_text(
+        f"📥 Broadcast ke {chat_count} chat diantrikan (job #{job.id})...\n\n"
+        f"Pesan: {_preview(broadcast_message, 50)}\n\n"
+        f"Batalkan dengan: /cancel {job.id}"
     )
+    job_registry.start(job, lambda job: _broadcast_job(context, job.message, user, broadcast_message))
+
+JOB_STATE_LABELS = {
+    JOB_QUEUED: "⏳ Menunggu",
+    JOB_RUNNING: "🔄 Berjalan",
+    JOB_DONE: "✅ Selesai",
+    JOB_FAILED: "💥 Gagal",
+    JOB_CANCELLED: "🛑 Dibatalkan",
+}
+
+def _format_job(job) -> str:
+    """One line of the /jobs list"""
+    line = f"#{job.id} {JOB_STATE_LABELS.get(job.state, job.state)} - {job.description}"
+    if job.started_at is not None:
+        line += f" ({format_duration(job.elapsed())})"
+    return line
+
+async def jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /jobs command to list background broadcast and bulk join jobs"""
+    user = update.effective_user
     
-    success_count = 0
-    failed_count = 0
+    if not auth_system.is_authorized(user.id):
+        await update.message.reply_text(auth_system.get_unauthorized_message())
+        return
+    
+    active = job_registry.active()
+    lines = ["⚙️ Job aktif:"]
+    lines += [_format_job(job) for job in active] or ["Tidak ada job yang berjalan."]
     
-    # Broadcast to all chats
-    for chat_info in all_chats:
+    recent = job_registry.recent()
+    if recent:
+        lines += ["", "🕘 Selesai (terbaru):"] + [_format_job(job) for job in recent]
+    
+    # Queue depth of the update processor, when it reports one
+    stats = getattr(context.application.update_processor, "stats", None)
+    if stats:
+        stats = stats()
+        lines += ["", f"📨 Update: {stats['running']} diproses, {stats['queued']} antri (puncak {stats['max_queued']})"]
+    
+    if active:
+        lines += ["", "Batalkan dengan: /cancel [id]"]
+    await update.message.reply_text("\n".join(lines))
+
+async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /cancel <id> to stop a queued or running background job"""
+    user = update.effective_user
+    username = user.username or user.first_name
+    
+    if not auth_system.is_authorized(user.id):
+        await update.message.reply_text(auth_system.get_unauthorized_message())
+        return
+    
+    tokens = update.message.text.split()
+    if len(tokens) != 2 or not tokens[1].lstrip('#').isdigit():
+        await update.message.reply_text("❌ Gunakan format: /cancel [id]\n\nLihat ID job dengan /jobs.")
+        return
+    
+    job_id = int(tokens[1].lstrip('#'))
+    job = job_registry.get(job_id)
+    if job is None:
+        await update.message.reply_text(f"❌ Job #{job_id} tidak ditemukan atau sudah selesai.")
+        return
+    
+    was_queued = job.state == JOB_QUEUED
+    job_registry.cancel(job_id)
+    logger.info(f"User {username}({user.id}) cancelled job #{job_id} ({job.kind})")
+    
+    # A job cancelled before it started never edits its own status message
+    if was_queued and job.message is not None:
         try:
-            await context.bot.send_message(
-                chat_id=chat_info['chat_id'],
-                text=broadcast_message
-            )
-            chat_storage.update_last_broadcast(chat_info['chat_id'])
-            success_count += 1
-            logger.info(f"Broadcast sent to {chat_info['title']} ({chat_info['chat_id']})")
-        except Exception as e:
-            failed_count += 1
-            logger.warning(f"Failed to send broadcast to {chat_info['title']} ({chat_info['chat_id']}): {e}")
-    
-    # Update status message with results
-    await status_msg.edit_text(
-        f"📊 Hasil Broadcast:\n\n"
-        f"✅ Berhasil: {success_count}\n"
-        f"❌ Gagal: {failed_count}\n"
-        f"📋 Total: {len(all_chats)}\n\n"
-        f"Pesan: {broadcast_message[:100]}{'...' if len(broadcast_message) > 100 else ''}"
-    )
+            await job.message.edit_text(f"🛑 Job #{job_id} dibatalkan sebelum dimulai.")
+        except TelegramError as e:
+            logger.warning(f"Could not update cancelled job message: {e}")
     
-    log_broadcast_attempt(user_id, username, broadcast_message, success_count, failed_count)
+    await update.message.reply_text(f"🛑 Job #{job_id} dibatalkan.")
 
 async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /list command to show all joined groups/channels"""
@@ -384,10 +931,7 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text(auth_system.get_unauthorized_message())
         return
     
-    # Get all stored chats
-    all_chats = chat_storage.get_all_chats()
-    
-    if not all_chats:
+    if chat_storage.get_chat_count() == 0:
         await update.message.reply_text(
             "📋 Tidak ada chat tersimpan!\n\n"
             "Gunakan /join [link] untuk bergabung ke grup/channel.\n"
@@ -395,28 +939,49 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         )
         return
     
-    # Format chat list
-    chat_list = "📋 Daftar Chat yang Tersimpan:\n\n"
+    text, page, total_pages = chat_list_pager.render(0)
+    await update.message.reply_text(text, reply_markup=_list_keyboard(page, total_pages))
+
+def _list_keyboard(page: int, total_pages: int):
+    """Prev/next buttons for a /list page (None when everything fits on one page)"""
+    if total_pages <= 1:
+        return None
+    
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"list:{page - 1}"))
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{total_pages}", callback_data=f"list:{page}"))
+    if page < total_pages - 1:
+        buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"list:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])
+
+async def list_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /list prev/next buttons (callback data "list:<page>")"""
+    query = update.callback_query
+    
+    if not auth_system.is_authorized(query.from_user.id):
+        await query.answer(auth_system.get_unauthorized_message(), show_alert=True)
+        return
+    
+    try:
+        requested_page = int(query.data.split(":", 1)[1])
+    except (IndexError, ValueError):
+        await query.answer()
+        return
     
-    for i, chat_info in enumerate(all_chats, 1):
-        chat_type_emoji = "📢" if chat_info['type'] == 'channel' else "👥"
-        chat_list += f"{i}. {chat_type_emoji} {chat_info['title']}\n"
-        chat_list += f"   Type: {chat_info['type'].title()}\n"
-        chat_list += f"   ID: {chat_info['chat_id']}\n"
-        if chat_info.get('last_broadcast'):
-            chat_list += f"   Last broadcast: {chat_info['last_broadcast'][:10]}\n"
-        chat_list += "\n"
+    text, page, total_pages = chat_list_pager.render(requested_page)
+    await query.answer()
     
-    chat_list += f"📊 Total: {len(all_chats)} chat"
+    if total_pages == 0:
+        await query.edit_message_text("📋 Tidak ada chat tersimpan!")
+        return
     
-    # Split message if too long
-    if len(chat_list) > 4000:
-        # Send in chunks
-        chunks = [chat_list[i:i+4000] for i in range(0, len(chat_list), 4000)]
-        for chunk in chunks:
-            await update.message.reply_text(chunk)
-    else:
-        await update.message.reply_text(chat_list)
+    try:
+        await query.edit_message_text(text, reply_markup=_list_keyboard(page, total_pages))
+    except BadRequest as e:
+        # Same page clicked again: Telegram rejects an identical edit
+        if "not modified" not in str(e).lower():
+            raise
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle non-command messages for authentication"""
@@ -0,0 +1,214 @@
+"""
+Broadcast engine for Telegram Auto-Join Bot
+Sends one message to many chats with a bounded worker pool and rate limits
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from telegram.error import RetryAfter
+
+from config import (
+    BROADCAST_WORKERS,
+    BROADCAST_GLOBAL_RATE,
+    BROADCAST_PER_CHAT_INTERVAL,
+    BROADCAST_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Asyncio token bucket allowing `rate` acquisitions per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float, optional): Maximum burst size, defaults to rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class PerChatLimiter:
+    """Tracks the earliest time each chat may receive the next message"""
+
+    def __init__(self, interval: float):
+        """
+        Initialize per-chat limiter
+
+        Args:
+            interval (float): Minimum seconds between two messages to one chat
+        """
+        self.interval = interval
+        self._next_allowed: Dict[int, float] = {}
+
+    def delay_for(self, chat_id: int) -> float:
+        """Seconds to wait before the chat may receive a message"""
+        return max(0.0, self._next_allowed.get(chat_id, 0.0) - time.monotonic())
+
+    def record_send(self, chat_id: int):
+        """Record that a message was just sent to the chat"""
+        self._next_allowed[chat_id] = time.monotonic() + self.interval
+
+    def park(self, chat_id: int, seconds: float):
+        """Block the chat for the given number of seconds"""
+        self._next_allowed[chat_id] = max(self._next_allowed.get(chat_id, 0.0), time.monotonic() + seconds)
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Get RetryAfter delay in seconds regardless of int/timedelta representation"""
+    delay = error.retry_after
+    if isinstance(delay, timedelta):
+        return delay.total_seconds()
+    return float(delay)
+
+class BroadcastEngine:
+    """
+    Concurrent broadcast sender
+
+    Workers pull chats from a shared queue, take a token from the global
+    bucket before every request and respect a per-chat interval. A chat that
+    hits RetryAfter is parked for the requested time while the workers keep
+    serving the other chats.
+    """
+
+    def __init__(self, send: Callable[[int], Awaitable],
+                 workers: int = BROADCAST_WORKERS,
+                 global_rate: float = BROADCAST_GLOBAL_RATE,
+                 per_chat_interval: float = BROADCAST_PER_CHAT_INTERVAL,
+                 max_retries: int = BROADCAST_MAX_RETRIES):
+        """
+        Initialize broadcast engine
+
+        Args:
+            send: Coroutine function sending the message to a chat ID
+            workers (int): Number of concurrent senders
+            global_rate (float): Maximum messages per second for the whole bot
+            per_chat_interval (float): Minimum seconds between messages to one chat
+            max_retries (int): RetryAfter retries per chat before giving up
+        """
+        self.send = send
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(global_rate)
+        self.per_chat = PerChatLimiter(per_chat_interval)
+        self.max_retries = max_retries
+
+    async def run(self, chats: List[Dict],
+                  on_result: Optional[Callable[[Dict, bool, Optional[Exception]], None]] = None) -> Dict:
+        """
+        Broadcast to all chats
+
+        Args:
+            chats (List[Dict]): Chat dicts as returned by chat_storage
+            on_result: Called as on_result(chat_info, success, error) for every chat
+
+        Returns:
+            Dict: Counts of 'success' and 'failed' deliveries
+        """
+        counts = {'success': 0, 'failed': 0}
+        if not chats:
+            return counts
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_info in chats:
+            queue.put_nowait((chat_info, 0))
+
+        # Parked chats wait in a heap ordered by the time they become ready
+        parked: List = []
+        remaining = len(chats)
+        done = asyncio.Event()
+        wakeup = asyncio.Event()
+        sequence = 0
+
+        def park(chat_info: Dict, attempts: int, delay: float):
+            nonlocal sequence
+            sequence += 1
+            heapq.heappush(parked, (time.monotonic() + delay, sequence, chat_info, attempts))
+            wakeup.set()
+
+        def finish(chat_info: Dict, success: bool, error: Optional[Exception]):
+            nonlocal remaining
+            counts['success' if success else 'failed'] += 1
+            remaining -= 1
+            if on_result:
+                try:
+                    on_result(chat_info, success, error)
+                except Exception as e:
+                    logger.error(f"Broadcast result callback failed: {e}")
+            if remaining == 0:
+                done.set()
+
+        async def release_parked():
+            while not done.is_set():
+                now = time.monotonic()
+                while parked and parked[0][0] <= now:
+                    _, _, chat_info, attempts = heapq.heappop(parked)
+                    queue.put_nowait((chat_info, attempts))
+                timeout = parked[0][0] - now if parked else None
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+        async def worker():
+            while True:
+                chat_info, attempts = await queue.get()
+                chat_id = chat_info['chat_id']
+
+                delay = self.per_chat.delay_for(chat_id)
+                if delay > 0:
+                    park(chat_info, attempts, delay)
+                    continue
+
+                await self.bucket.acquire()
+                self.per_chat.record_send(chat_id)
+                try:
+                    await self.send(chat_id)
+                except RetryAfter as e:
+                    seconds = retry_after_seconds(e)
+                    if attempts >= self.max_retries:
+                        finish(chat_info, False, e)
+                        continue
+                    logger.warning(f"RetryAfter {seconds}s for chat {chat_id}, parking it")
+                    self.per_chat.park(chat_id, seconds)
+                    park(chat_info, attempts + 1, seconds)
+                except Exception as e:
+                    finish(chat_info, False, e)
+                else:
+                    finish(chat_info, True, None)
+
+        tasks = [asyncio.create_task(release_parked())]
+        tasks += [asyncio.create_task(worker()) for _ in range(min(self.workers, len(chats)))]
+        try:
+            await done.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return counts
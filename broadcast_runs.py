@@ -0,0 +1,185 @@
+"""
+Persistent broadcast runs
+Records every /bc run with its message and per-chat delivery state in SQLite so a run can be resumed
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import BROADCAST_STATE_BATCH_SIZE, BROADCAST_STATE_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_RUNS_FILE = "broadcast_runs.db"
+
+RUN_RUNNING = "running"
+RUN_DONE = "done"
+RUN_INTERRUPTED = "interrupted"
+
+DELIVERY_PENDING = "pending"
+DELIVERY_SENT = "sent"
+DELIVERY_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS broadcast_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    message TEXT NOT NULL,
+    state TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+    run_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    chat_id INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (run_id, chat_id)
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_state ON broadcast_deliveries(run_id, state, position);
+"""
+
+class BroadcastRunStore:
+    """
+    Durable record of broadcast runs
+
+    A run stores the message and one delivery row per target chat, in the
+    order the chats were taken from storage. Delivery results are buffered
+    and written in batches (every BROADCAST_STATE_BATCH_SIZE results or
+    BROADCAST_STATE_FLUSH_INTERVAL seconds, whichever comes first), so a
+    crash can re-send at most one unflushed batch on resume.
+    """
+
+    def __init__(self, db_file: str = BROADCAST_RUNS_FILE,
+                 batch_size: int = BROADCAST_STATE_BATCH_SIZE,
+                 flush_interval: float = BROADCAST_STATE_FLUSH_INTERVAL):
+        self.db_file = db_file
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+        # Runs still marked running were cut off by a restart
+        with self._conn:
+            self._conn.execute(
+                "UPDATE broadcast_runs SET state = ? WHERE state = ?", (RUN_INTERRUPTED, RUN_RUNNING)
+            )
+
+    def close(self):
+        """Write buffered results and close the database"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def create_run(self, user_id: int, message: str, chat_ids: Iterable[int]) -> int:
+        """
+        Create a run with every target chat pending
+
+        Args:
+            user_id (int): Telegram user who started the broadcast
+            message (str): Broadcast text
+            chat_ids: Target chat IDs, in delivery order
+
+        Returns:
+            int: Run ID
+        """
+        chat_ids = list(chat_ids)
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO broadcast_runs (user_id, message, state, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, message, RUN_RUNNING, len(chat_ids), now, now)
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO broadcast_deliveries (run_id, position, chat_id, state) VALUES (?, ?, ?, ?)",
+                [(run_id, position, chat_id, DELIVERY_PENDING) for position, chat_id in enumerate(chat_ids)]
+            )
+        return run_id
+
+    def get_run(self, run_id: int = None) -> Optional[Dict]:
+        """Get a run by ID, or the latest run when run_id is None"""
+        with self._lock:
+            if run_id is None:
+                row = self._conn.execute("SELECT * FROM broadcast_runs ORDER BY id DESC LIMIT 1").fetchone()
+            else:
+                row = self._conn.execute("SELECT * FROM broadcast_runs WHERE id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_chat_ids(self, run_id: int) -> List[int]:
+        """Chats of a run that have not been attempted yet, in delivery order"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id FROM broadcast_deliveries WHERE run_id = ? AND state = ? ORDER BY position",
+                (run_id, DELIVERY_PENDING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def progress(self, run_id: int) -> Dict[str, int]:
+        """Number of deliveries per state"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM broadcast_deliveries WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall()
+        counts = {DELIVERY_PENDING: 0, DELIVERY_SENT: 0, DELIVERY_FAILED: 0}
+        counts.update({state: count for state, count in rows})
+        return counts
+
+    def record(self, run_id: int, chat_id: int, success: bool, error: str = None):
+        """
+        Buffer one delivery result; flushed in batches
+
+        Args:
+            run_id (int): Run ID
+            chat_id (int): Chat ID
+            success (bool): Whether the message was delivered
+            error (str, optional): Error description for failed deliveries
+        """
+        state = DELIVERY_SENT if success else DELIVERY_FAILED
+        with self._lock:
+            self._pending.append((state, error, run_id, chat_id))
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered delivery results in one transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE broadcast_deliveries SET state = ?, error = ? WHERE run_id = ? AND chat_id = ?",
+                    pending
+                )
+                self._conn.executemany(
+                    "UPDATE broadcast_runs SET updated_at = ? WHERE id = ?",
+                    [(time.time(), run_id) for run_id in {item[2] for item in pending}]
+                )
+
+    def set_state(self, run_id: int, state: str):
+        """Flush buffered results and set the run state"""
+        self.flush()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE broadcast_runs SET state = ?, updated_at = ? WHERE id = ?", (state, time.time(), run_id)
+            )
+
+# Global instance
+broadcast_runs = BroadcastRunStore()
@@ -0,0 +1,162 @@
+"""
+Chat health tracking for broadcasts
+Classifies delivery failures and prunes or migrates chats that can no longer receive messages
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden
+
+from chat_storage import chat_storage, ChatStorage
+from config import CHAT_PRUNE_THRESHOLD
+from persistence import json_writer
+
+logger = logging.getLogger(__name__)
+
+CHAT_HEALTH_FILE = "chat_health.json"
+
+FAILURE_FORBIDDEN = "forbidden"
+FAILURE_NOT_FOUND = "not_found"
+FAILURE_MIGRATED = "migrated"
+FAILURE_OTHER = "other"
+
+# Failures that will not go away on their own
+PERMANENT_FAILURES = (FAILURE_FORBIDDEN, FAILURE_NOT_FOUND)
+
+ACTION_PRUNED = "pruned"
+ACTION_MIGRATED = "migrated"
+
+# BadRequest messages meaning the chat is gone
+NOT_FOUND_MESSAGES = ("chat not found", "group chat was deactivated", "peer_id_invalid", "chat_id is empty")
+
+# Prune/migrate actions kept for the report
+ACTION_HISTORY_SIZE = 200
+
+def classify_failure(error: Optional[Exception]) -> str:
+    """
+    Classify a send_message failure
+
+    Args:
+        error (Exception): Error raised by send_message
+
+    Returns:
+        str: One of the FAILURE_* constants
+    """
+    if isinstance(error, ChatMigrated):
+        return FAILURE_MIGRATED
+    if isinstance(error, Forbidden):
+        return FAILURE_FORBIDDEN
+    if isinstance(error, BadRequest) and any(text in str(error).lower() for text in NOT_FOUND_MESSAGES):
+        return FAILURE_NOT_FOUND
+    return FAILURE_OTHER
+
+class ChatHealth:
+    """
+    Consecutive permanent failures per chat
+
+    A chat whose sends fail permanently (bot kicked, chat deleted)
+    CHAT_PRUNE_THRESHOLD times in a row is removed from chat storage; any
+    success resets its counter. ChatMigrated carries the new supergroup ID,
+    so those chats are moved to it right away. Counters and the history of
+    pruned/migrated chats are persisted in chat_health.json.
+    """
+
+    def __init__(self, health_file: str = CHAT_HEALTH_FILE, threshold: int = CHAT_PRUNE_THRESHOLD,
+                 storage: ChatStorage = None):
+        self.health_file = health_file
+        self.threshold = max(1, threshold)
+        self.storage = storage or chat_storage
+        self._failures: Dict[str, Dict] = {}
+        self._actions = deque(maxlen=ACTION_HISTORY_SIZE)
+        self._load()
+
+    def _load(self):
+        """Load counters and action history"""
+        if not os.path.exists(self.health_file):
+            return
+        try:
+            with open(self.health_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._failures = data.get("failures", {})
+            self._actions.extend(data.get("actions", []))
+        except Exception as e:
+            logger.error(f"Error loading chat health: {e}")
+
+    def _snapshot(self) -> Dict:
+        """Serializable copy of the state, taken on the event loop thread"""
+        return {"failures": {key: dict(value) for key, value in self._failures.items()}, "actions": list(self._actions)}
+
+    def _save(self):
+        json_writer.write(self.health_file, self._snapshot())
+
+    def record_success(self, chat_id: int):
+        """Reset the failure counter of a chat"""
+        if self._failures.pop(str(chat_id), None) is not None:
+            self._save()
+
+    def record_failure(self, chat_info: Dict, error: Optional[Exception]) -> Tuple[str, Optional[str]]:
+        """
+        Record a failed delivery and prune or migrate the chat when due
+
+        Args:
+            chat_info (Dict): Chat dict as returned by chat_storage
+            error (Exception): Error raised by send_message
+
+        Returns:
+            Tuple[str, Optional[str]]: Failure kind and the action taken
+                (ACTION_PRUNED, ACTION_MIGRATED or None)
+        """
+        chat_id = chat_info['chat_id']
+        kind = classify_failure(error)
+
+        if kind == FAILURE_MIGRATED:
+            self._failures.pop(str(chat_id), None)
+            self.storage.migrate_chat(chat_id, error.new_chat_id)
+            self._add_action(ACTION_MIGRATED, chat_info, kind, new_chat_id=error.new_chat_id)
+            return kind, ACTION_MIGRATED
+
+        if kind not in PERMANENT_FAILURES:
+            return kind, None
+
+        entry = self._failures.setdefault(str(chat_id), {"count": 0})
+        entry["count"] += 1
+        entry["last_failure"] = kind
+        entry["last_error"] = str(error)[:200]
+        entry["last_failure_at"] = datetime.now().isoformat()
+
+        if entry["count"] < self.threshold:
+            self._save()
+            return kind, None
+
+        del self._failures[str(chat_id)]
+        self.storage.remove_chat(chat_id)
+        self._add_action(ACTION_PRUNED, chat_info, kind, error=str(error)[:200])
+        return kind, ACTION_PRUNED
+
+    def _add_action(self, action: str, chat_info: Dict, kind: str, **details):
+        """Append a prune/migrate action to the history"""
+        self._actions.append(dict({
+            "action": action,
+            "chat_id": chat_info['chat_id'],
+            "title": chat_info.get('title'),
+            "reason": kind,
+            "at": datetime.now().isoformat()
+        }, **details))
+        logger.warning(f"Chat {action}: {chat_info.get('title')} ({chat_info['chat_id']}), reason: {kind}")
+        self._save()
+
+    def failure_count(self, chat_id: int) -> int:
+        """Consecutive permanent failures of a chat"""
+        return self._failures.get(str(chat_id), {}).get("count", 0)
+
+    def recent_actions(self, limit: int = 20) -> List[Dict]:
+        """Most recent prune/migrate actions, newest first"""
+        return list(self._actions)[-limit:][::-1]
+
+# Global instance
+chat_health = ChatHealth()
@@ -0,0 +1,111 @@
+"""
+Paginated chat list for the /list command
+Renders one page at a time from a sorted index, with an LRU cache of rendered pages
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from chat_storage import chat_storage, ChatStorage
+from config import LIST_PAGE_SIZE, LIST_PAGE_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Longest title shown per entry, so a full page stays well under 4096 characters
+MAX_TITLE_LENGTH = 64
+
+def _format_entry(number: int, chat_info: Dict) -> str:
+    """Format one chat of the list"""
+    chat_type_emoji = "📢" if chat_info['type'] == 'channel' else "👥"
+    title = chat_info['title'] or "Unknown"
+    if len(title) > MAX_TITLE_LENGTH:
+        title = title[:MAX_TITLE_LENGTH - 1] + "…"
+
+    lines = [
+        f"{number}. {chat_type_emoji} {title}",
+        f"   Type: {chat_info['type'].title()}",
+        f"   ID: {chat_info['chat_id']}"
+    ]
+    if chat_info.get('last_broadcast'):
+        lines.append(f"   Last broadcast: {chat_info['last_broadcast'][:10]}")
+    return "\n".join(lines)
+
+class ChatListPager:
+    """
+    Pages of the stored chat list
+
+    The chats are sorted once per storage version (by title, then ID) and
+    pages are rendered on demand. Rendered pages are kept in an LRU cache
+    that is dropped whenever chat_storage.version changes.
+    """
+
+    def __init__(self, storage: ChatStorage = None, page_size: int = LIST_PAGE_SIZE,
+                 cache_size: int = LIST_PAGE_CACHE_SIZE):
+        """
+        Initialize pager
+
+        Args:
+            storage (ChatStorage, optional): Chat storage, defaults to chat_storage
+            page_size (int): Chats per page
+            cache_size (int): Rendered pages kept in the LRU cache
+        """
+        self.storage = storage or chat_storage
+        self.page_size = max(1, page_size)
+        self.cache_size = cache_size
+        self._version = None
+        self._index: List[Dict] = []
+        self._pages: "OrderedDict[int, str]" = OrderedDict()
+
+    def _refresh(self):
+        """Rebuild the sorted index and drop cached pages after a storage mutation"""
+        if self._version == self.storage.version:
+            return
+        self._version = self.storage.version
+        self._index = sorted(
+            self.storage.get_all_chats(),
+            key=lambda chat: ((chat['title'] or "").casefold(), chat['chat_id'])
+        )
+        self._pages.clear()
+
+    def page_count(self) -> int:
+        """Number of pages (0 when no chats are stored)"""
+        self._refresh()
+        return -(-len(self._index) // self.page_size)
+
+    def render(self, page: int) -> Tuple[str, int, int]:
+        """
+        Render one page of the chat list
+
+        Args:
+            page (int): Zero-based page number, clamped to the valid range
+
+        Returns:
+            Tuple[str, int, int]: Page text, actual page number and page count
+        """
+        total_pages = self.page_count()
+        if total_pages == 0:
+            return "", 0, 0
+        page = min(max(page, 0), total_pages - 1)
+
+        text = self._pages.get(page)
+        if text is not None:
+            self._pages.move_to_end(page)
+            return text, page, total_pages
+
+        start = page * self.page_size
+        chats = self._index[start:start + self.page_size]
+        entries = "\n\n".join(_format_entry(start + i, chat_info) for i, chat_info in enumerate(chats, 1))
+        text = (
+            f"📋 Daftar Chat yang Tersimpan (halaman {page + 1}/{total_pages}):\n\n"
+            f"{entries}\n\n"
+            f"📊 Total: {len(self._index)} chat"
+        )
+
+        self._pages[page] = text
+        while len(self._pages) > self.cache_size:
+            self._pages.popitem(last=False)
+        return text, page, total_pages
+
+# Global instance
+chat_list_pager = ChatListPager()
@@ -3,145 +3,476 @@ Chat storage module for Telegram Auto-Join Bot
 Manages storage and retrieval of chat IDs where bot is a member
 """
 
+import atexit
 import json
 import os
 import logging
+import sys
+import threading
+import time
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from config import CHAT_STORAGE_BACKEND
+from persistence import json_writer
+from utils import invite_key
+
 logger = logging.getLogger(__name__)
 
 STORAGE_FILE = "chat_storage.json"
+JOINED_GROUPS_FILE = "joined_groups.json"
 
-class ChatStorage:
-    """Simple file-based chat storage"""
-    
-    def __init__(self):
-        self.storage_file = STORAGE_FILE
+# Seconds to wait after a mutation before writing, so bursts of updates
+# (e.g. a broadcast run) are coalesced into a single file write
+FLUSH_DELAY = 1.0
+
+def _to_chat_data(chat_id, chat_info: Dict) -> Dict:
+    """Convert a stored record into the public chat dict"""
+    return {
+        "chat_id": int(chat_id),
+        "title": chat_info.get("title", "Unknown"),
+        "type": chat_info.get("type", "unknown"),
+        "invite_link": chat_info.get("invite_link"),
+        "invite_hash": chat_info.get("invite_hash"),
+        "participants_count": chat_info.get("participants_count"),
+        "joined_at": chat_info.get("joined_at"),
+        "last_broadcast": chat_info.get("last_broadcast")
+    }
+
+class JsonChatBackend:
+    """
+    In-memory chat backend with write-behind persistence to a JSON file
+
+    Chats are keyed by chat ID; a secondary dict maps invite hashes to chat
+    IDs so lookups by either key are O(1).
+    """
+
+    def __init__(self, storage_file: str = STORAGE_FILE, flush_delay: float = FLUSH_DELAY):
+        self.storage_file = storage_file
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = False
+        self._flusher = None
+        self._chats: Dict[str, Dict] = self._load_data().get("chats", {})
+        self._by_invite: Dict[str, str] = {}
+        for chat_id, chat_info in self._chats.items():
+            # Records written before the invite index get their hash once
+            if "invite_hash" not in chat_info:
+                chat_info["invite_hash"] = invite_key(chat_info.get("invite_link"))
+            if chat_info["invite_hash"]:
+                self._by_invite[chat_info["invite_hash"]] = chat_id
         self._ensure_storage_file()
-    
+
     def _ensure_storage_file(self):
         """Ensure storage file exists"""
         if not os.path.exists(self.storage_file):
-            self._save_data({"chats": {}})
-    
+            json_writer.write(self.storage_file, {"chats": {}})
+
     def _load_data(self) -> Dict:
         """Load data from storage file"""
         try:
             with open(self.storage_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+        except FileNotFoundError:
+            return {"chats": {}}
+        except json.JSONDecodeError as e:
             logger.error(f"Error loading storage file: {e}")
             return {"chats": {}}
-    
-    def _save_data(self, data: Dict):
-        """Save data to storage file"""
+
+    def _snapshot(self) -> Dict:
+        """Copy the in-memory state so it can be serialised outside the lock"""
+        with self._lock:
+            return {"chats": {chat_id: dict(info) for chat_id, info in self._chats.items()}}
+
+    def _mark_dirty(self):
+        """Schedule a write-behind flush of the in-memory state"""
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="chat-storage-flusher", daemon=True
+            )
+            self._flusher.start()
+        self._dirty.set()
+
+    def _flush_loop(self):
+        """Background loop that coalesces mutations into delayed writes"""
+        while not self._closed:
+            self._dirty.wait()
+            if self._closed:
+                break
+            time.sleep(self.flush_delay)
+            self.flush()
+
+    def flush(self):
+        """Write pending changes to disk immediately"""
+        with self._write_lock:
+            if not self._dirty.is_set():
+                return
+            self._dirty.clear()
+            # The snapshot is taken on the writer thread, just before writing
+            future = json_writer.write(self.storage_file, self._snapshot)
         try:
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving storage file: {e}")
-    
-    def add_chat(self, chat_id: int, chat_title: str, chat_type: str, invite_link: str = None):
+            future.result()
+        except Exception:
+            # Already logged by the writer; the next mutation retries
+            pass
+
+    def close(self):
+        """Flush pending changes and stop the background flusher"""
+        self.flush()
+        self._closed = True
+        self._dirty.set()
+
+    def _put_locked(self, chat_id: int, chat_info: Dict):
+        """Insert or replace a record and keep the invite index in step"""
+        key = str(chat_id)
+        previous = self._chats.get(key)
+        if previous is not None and previous.get("invite_hash"):
+            self._by_invite.pop(previous["invite_hash"], None)
+        self._chats[key] = chat_info
+        if chat_info.get("invite_hash"):
+            self._by_invite[chat_info["invite_hash"]] = key
+
+    def put_chat(self, chat_id: int, chat_info: Dict):
+        """Insert or replace a chat record"""
+        with self._lock:
+            self._put_locked(chat_id, chat_info)
+        self._mark_dirty()
+
+    def put_chats(self, chats: Dict[int, Dict]):
+        """Insert or replace several chat records in one write"""
+        with self._lock:
+            for chat_id, chat_info in chats.items():
+                self._put_locked(chat_id, chat_info)
+        self._mark_dirty()
+
+    def delete_chat(self, chat_id: int) -> Optional[Dict]:
+        """Delete a chat record, returning it if it existed"""
+        with self._lock:
+            chat_info = self._chats.pop(str(chat_id), None)
+            if chat_info is not None and chat_info.get("invite_hash"):
+                self._by_invite.pop(chat_info["invite_hash"], None)
+        if chat_info is not None:
+            self._mark_dirty()
+        return chat_info
+
+    def get_chat(self, chat_id: int) -> Optional[Dict]:
+        """Get a single chat record"""
+        with self._lock:
+            chat_info = self._chats.get(str(chat_id))
+            return _to_chat_data(chat_id, chat_info) if chat_info is not None else None
+
+    def get_chat_by_invite(self, invite_hash: str) -> Optional[Dict]:
+        """Get the chat record joined through an invite hash"""
+        with self._lock:
+            chat_id = self._by_invite.get(invite_hash)
+            return _to_chat_data(chat_id, self._chats[chat_id]) if chat_id is not None else None
+
+    def get_all_chats(self) -> List[Dict]:
+        """Get all chat records"""
+        with self._lock:
+            return [_to_chat_data(chat_id, chat_info) for chat_id, chat_info in self._chats.items()]
+
+    def get_chat_count(self) -> int:
+        """Get number of chat records"""
+        return len(self._chats)
+
+    def is_chat_stored(self, chat_id: int) -> bool:
+        """Check whether a chat record exists"""
+        return str(chat_id) in self._chats
+
+    def set_last_broadcast(self, chat_id: int, timestamp: str):
+        """Set the last broadcast timestamp of a chat"""
+        with self._lock:
+            chat_info = self._chats.get(str(chat_id))
+            if chat_info is None:
+                return
+            chat_info["last_broadcast"] = timestamp
+        self._mark_dirty()
+
+    def set_last_broadcast_many(self, chat_ids: List[int], timestamp: str):
+        """Set the last broadcast timestamp of several chats in one write"""
+        with self._lock:
+            for chat_id in chat_ids:
+                chat_info = self._chats.get(str(chat_id))
+                if chat_info is not None:
+                    chat_info["last_broadcast"] = timestamp
+        self._mark_dirty()
+
+def create_backend(name: str = CHAT_STORAGE_BACKEND):
+    """
+    Create a chat storage backend by name
+
+    Args:
+        name (str): Backend name, "json" or "sqlite"
+
+    Returns:
+        Backend instance implementing the ChatStorage backend interface
+    """
+    if name == "sqlite":
+        from sqlite_storage import SqliteChatBackend
+        return SqliteChatBackend()
+    if name != "json":
+        logger.warning(f"Unknown chat storage backend '{name}', falling back to json")
+    return JsonChatBackend()
+
+class ChatStorage:
+    """
+    Chat storage facade over a pluggable backend (JSON file or SQLite)
+
+    `version` is bumped on every mutation, so views derived from the stored
+    chats (e.g. /list pages) can tell when they are stale.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.version = 0
+        atexit.register(self.close)
+
+    def flush(self):
+        """Persist pending changes immediately"""
+        self.backend.flush()
+
+    def close(self):
+        """Flush pending changes and release backend resources"""
+        self.backend.close()
+
+    def add_chat(self, chat_id: int, chat_title: str, chat_type: str, invite_link: str = None,
+                 participants_count: int = None):
         """
         Add a chat to storage
-        
+
         Args:
             chat_id (int): Chat ID
             chat_title (str): Chat title
             chat_type (str): Chat type (group, supergroup, channel)
             invite_link (str, optional): Original invite link used to join
+            participants_count (int, optional): Member count at join time
         """
-        data = self._load_data()
-        
         chat_info = {
             "title": chat_title,
             "type": chat_type,
             "invite_link": invite_link,
+            "invite_hash": invite_key(invite_link),
+            "participants_count": participants_count,
             "joined_at": datetime.now().isoformat(),
             "last_broadcast": None
         }
-        
-        data["chats"][str(chat_id)] = chat_info
-        self._save_data(data)
-        
+
+        self.backend.put_chat(chat_id, chat_info)
+        self.version += 1
+
         logger.info(f"Added chat to storage: {chat_title} ({chat_id})")
-    
+
     def remove_chat(self, chat_id: int):
         """
         Remove a chat from storage
-        
+
         Args:
             chat_id (int): Chat ID to remove
         """
-        data = self._load_data()
-        
-        if str(chat_id) in data["chats"]:
-            chat_info = data["chats"][str(chat_id)]
-            del data["chats"][str(chat_id)]
-            self._save_data(data)
+        chat_info = self.backend.delete_chat(chat_id)
+
+        if chat_info is not None:
+            self.version += 1
             logger.info(f"Removed chat from storage: {chat_info.get('title', 'Unknown')} ({chat_id})")
         else:
             logger.warning(f"Chat {chat_id} not found in storage")
-    
+
+    def migrate_chat(self, old_chat_id: int, new_chat_id: int):
+        """
+        Move a chat to a new ID after its group was upgraded to a supergroup
+
+        Args:
+            old_chat_id (int): Chat ID of the old group
+            new_chat_id (int): Chat ID of the new supergroup
+        """
+        chat_info = self.backend.delete_chat(old_chat_id)
+        if chat_info is None:
+            return
+        self.version += 1
+
+        if self.backend.is_chat_stored(new_chat_id):
+            logger.info(f"Removed migrated chat {old_chat_id}, {new_chat_id} is already stored")
+            return
+
+        chat_info = {key: value for key, value in chat_info.items() if key != "chat_id"}
+        chat_info["type"] = "supergroup"
+        self.backend.put_chat(new_chat_id, chat_info)
+        logger.info(f"Migrated chat {chat_info.get('title', 'Unknown')} from {old_chat_id} to {new_chat_id}")
+
+    def get_chat(self, chat_id: int) -> Optional[Dict]:
+        """
+        Get a single stored chat
+
+        Args:
+            chat_id (int): Chat ID
+
+        Returns:
+            Optional[Dict]: Chat information or None if not stored
+        """
+        return self.backend.get_chat(chat_id)
+
+    def get_chat_by_invite(self, invite_link: str) -> Optional[Dict]:
+        """
+        Get the stored chat that was joined through an invite link
+
+        Args:
+            invite_link (str): Invite link in any format parse_invite_link accepts
+
+        Returns:
+            Optional[Dict]: Chat information or None if no chat matches
+        """
+        key = invite_key(invite_link)
+        return self.backend.get_chat_by_invite(key) if key else None
+
+    def is_invite_stored(self, invite_link: str) -> bool:
+        """
+        Check if a chat joined through an invite link is already stored
+
+        Args:
+            invite_link (str): Invite link in any format parse_invite_link accepts
+
+        Returns:
+            bool: True if a stored chat has the same normalised invite hash
+        """
+        return self.get_chat_by_invite(invite_link) is not None
+
     def get_all_chats(self) -> List[Dict]:
         """
         Get all stored chats
-        
+
         Returns:
             List[Dict]: List of chat information
         """
-        data = self._load_data()
-        chats = []
-        
-        for chat_id, chat_info in data["chats"].items():
-            chat_data = {
-                "chat_id": int(chat_id),
-                "title": chat_info.get("title", "Unknown"),
-                "type": chat_info.get("type", "unknown"),
-                "invite_link": chat_info.get("invite_link"),
-                "joined_at": chat_info.get("joined_at"),
-                "last_broadcast": chat_info.get("last_broadcast")
-            }
-            chats.append(chat_data)
-        
-        return chats
-    
+        return self.backend.get_all_chats()
+
     def get_chat_count(self) -> int:
         """
         Get total number of stored chats
-        
+
         Returns:
             int: Number of chats
         """
-        data = self._load_data()
-        return len(data["chats"])
-    
+        return self.backend.get_chat_count()
+
     def update_last_broadcast(self, chat_id: int):
         """
         Update last broadcast timestamp for a chat
-        
+
         Args:
             chat_id (int): Chat ID
         """
-        data = self._load_data()
-        
-        if str(chat_id) in data["chats"]:
-            data["chats"][str(chat_id)]["last_broadcast"] = datetime.now().isoformat()
-            self._save_data(data)
-    
+        self.backend.set_last_broadcast(chat_id, datetime.now().isoformat())
+        self.version += 1
+
+    def update_last_broadcast_many(self, chat_ids: List[int], ts: Optional[datetime] = None):
+        """
+        Update last broadcast timestamp for several chats in one transaction
+
+        Args:
+            chat_ids (List[int]): Chat IDs that received the broadcast
+            ts (datetime, optional): Broadcast time, defaults to now
+        """
+        if not chat_ids:
+            return
+        timestamp = (ts or datetime.now()).isoformat()
+        self.backend.set_last_broadcast_many(list(chat_ids), timestamp)
+        self.version += 1
+
+    def put_chats(self, chats: Dict[int, Dict]):
+        """
+        Insert or replace several raw chat records in one batch
+
+        Args:
+            chats (Dict[int, Dict]): Chat ID -> record (title, type, invite_link, ...)
+        """
+        if not chats:
+            return
+        self.backend.put_chats(chats)
+        self.version += 1
+
     def is_chat_stored(self, chat_id: int) -> bool:
         """
         Check if a chat is already stored
-        
+
         Args:
             chat_id (int): Chat ID to check
-            
+
         Returns:
             bool: True if chat is stored
         """
-        data = self._load_data()
-        return str(chat_id) in data["chats"]
+        return self.backend.is_chat_stored(chat_id)
+
+def migrate_joined_groups(joined_file: str = JOINED_GROUPS_FILE, storage: ChatStorage = None) -> int:
+    """
+    Merge joined_groups.json (written by user_autojoin.py) into chat storage
+
+    Groups not stored yet are added; stored groups without an invite hash
+    get the one from joined_groups.json. Entries without a chat ID cannot
+    be keyed and are skipped. The source file is renamed to
+    `<file>.migrated` afterwards so the merge runs only once.
+
+    Args:
+        joined_file (str): Path to joined_groups.json
+        storage (ChatStorage, optional): Target storage, defaults to chat_storage
+
+    Returns:
+        int: Number of chats added or updated
+    """
+    storage = storage or chat_storage
+    try:
+        with open(joined_file, 'r', encoding='utf-8') as f:
+            groups = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except json.JSONDecodeError as e:
+        logger.error(f"Cannot read {joined_file} for migration: {e}")
+        return 0
+
+    merged = {}
+    skipped = 0
+    for group in groups:
+        try:
+            chat_id = int(group.get('id'))
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+
+        link = group.get('link')
+        existing = storage.get_chat(chat_id)
+        if existing is not None:
+            if existing.get('invite_hash') or not invite_key(link):
+                continue
+            chat_info = {key: value for key, value in existing.items() if key != 'chat_id'}
+        else:
+            joined_at = group.get('joined_at')
+            chat_info = {
+                "title": group.get('title', 'Unknown'),
+                "type": group.get('type', 'group'),
+                "joined_at": datetime.fromtimestamp(joined_at).isoformat() if joined_at else None,
+                "last_broadcast": None
+            }
+        chat_info.update({
+            "invite_link": chat_info.get("invite_link") or link,
+            "invite_hash": invite_key(chat_info.get("invite_link") or link),
+            "participants_count": chat_info.get("participants_count") or group.get('participants_count')
+        })
+        merged[chat_id] = chat_info
+
+    if merged:
+        storage.put_chats(merged)
+        storage.flush()
+    os.replace(joined_file, f"{joined_file}.migrated")
+
+    logger.info(f"Merged {len(merged)} groups from {joined_file} into chat storage ({skipped} without chat ID skipped)")
+    return len(merged)
 
 # Global instance
-chat_storage = ChatStorage()
\ No newline at end of file
+chat_storage = ChatStorage()
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else JOINED_GROUPS_FILE
+    count = migrate_joined_groups(source)
+    print(f"✅ {count} grup dari {source} digabung ke chat storage")
@@ -3,85 +3,257 @@ Configuration file for the Telegram bot
 Contains bot token and enhanced logging setup
 """
 
+import atexit
 import logging
 import os
-from datetime import datetime
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
+
+from log_rotation import SizedTimedRotatingFileHandler
 
 # Bot token - get from environment variable with fallback
 BOT_TOKEN = os.getenv("BOT_TOKEN", "8076072273:AAEp87CvX6ykImJey3r_vWo_iZ4gx_cOj7M")
 
+# Update delivery: "polling" (getUpdates) or "webhook" (PTB run_webhook).
+# Webhook mode listens on $PORT and registers WEBHOOK_URL + "/" + WEBHOOK_PATH
+# (WEBHOOK_URL defaults to the public URL Render/Railway provide);
+# Telegram must echo WEBHOOK_SECRET in the X-Telegram-Bot-Api-Secret-Token header.
+# Telegram only accepts A-Z, a-z, 0-9, "_" and "-" (up to 256 chars) there, so
+# other characters, such as "+/=" in values generated by Render, are dropped
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_URL = (
+    os.getenv("WEBHOOK_URL")
+    or os.getenv("RENDER_EXTERNAL_URL")
+    or (f"https://{os.getenv('RAILWAY_PUBLIC_DOMAIN')}" if os.getenv("RAILWAY_PUBLIC_DOMAIN") else "")
+).rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+WEBHOOK_SECRET = re.sub(r"[^A-Za-z0-9_-]", "", os.getenv("WEBHOOK_SECRET", ""))[:256]
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8443"))
+
+# Bot API server, overridable for local test harnesses (webhook_harness.py)
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL", "")
+
+# Updates handled at the same time; one user's updates always run in order
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "16"))
+
+# Background jobs (/bc, bulk /join) running at the same time; the rest wait
+JOB_MAX_RUNNING = int(os.getenv("JOB_MAX_RUNNING", "2"))
+
+# Connect the user account (Telethon) at startup instead of on the first
+# private /join; off by default to keep cold starts fast
+USER_ACCOUNT_EAGER_START = os.getenv("USER_ACCOUNT_EAGER_START", "0").lower() not in ("0", "false", "no")
+
+# Telethon user session: seconds between snapshot writes of the in-memory
+# session (user_session.json), and an optional StringSession to start from
+# when no snapshot exists (container deployments without a persistent disk)
+SESSION_SNAPSHOT_INTERVAL = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "60"))
+USER_SESSION_STRING = os.getenv("USER_SESSION_STRING", "")
+
+# Chat storage backend: "json" (chat_storage.json) or "sqlite" (chat_storage.db)
+CHAT_STORAGE_BACKEND = os.getenv("CHAT_STORAGE_BACKEND", "json").lower()
+
+# Number of delivered chats after which /bc commits last_broadcast timestamps
+BROADCAST_CHECKPOINT_SIZE = int(os.getenv("BROADCAST_CHECKPOINT_SIZE", "100"))
+
+# Broadcast pacing, kept under Telegram's bot limits (~30 msg/s overall,
+# ~20 msg/min per group)
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", "25"))
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "3"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
+# Broadcast run persistence: delivery results are written in batches of
+# this many results, or at least every FLUSH_INTERVAL seconds
+BROADCAST_STATE_BATCH_SIZE = int(os.getenv("BROADCAST_STATE_BATCH_SIZE", "50"))
+BROADCAST_STATE_FLUSH_INTERVAL = float(os.getenv("BROADCAST_STATE_FLUSH_INTERVAL", "2"))
+
+# Consecutive permanent send failures (bot kicked, chat deleted) after
+# which a chat is removed from storage
+CHAT_PRUNE_THRESHOLD = int(os.getenv("CHAT_PRUNE_THRESHOLD", "3"))
+
+# Minimum seconds between two edits of the /bc progress message
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5"))
+
+# Adaptive pacing of user-account joins (seconds): starting interval,
+# bounds, and how long without FloodWait before the interval narrows
+JOIN_PACER_BASE_INTERVAL = float(os.getenv("JOIN_PACER_BASE_INTERVAL", "30"))
+JOIN_PACER_MIN_INTERVAL = float(os.getenv("JOIN_PACER_MIN_INTERVAL", "10"))
+JOIN_PACER_MAX_INTERVAL = float(os.getenv("JOIN_PACER_MAX_INTERVAL", "900"))
+JOIN_PACER_QUIET_PERIOD = float(os.getenv("JOIN_PACER_QUIET_PERIOD", "3600"))
+
+# Longest pacer wait (seconds) a single /join sleeps inside the handler;
+# beyond it the user is told how long to wait instead
+JOIN_INTERACTIVE_MAX_WAIT = float(os.getenv("JOIN_INTERACTIVE_MAX_WAIT", "15"))
+
+# Invite result cache: max entries (LRU) and seconds to remember each outcome
+INVITE_CACHE_SIZE = int(os.getenv("INVITE_CACHE_SIZE", "2048"))
+INVITE_CACHE_TTL_JOINED = float(os.getenv("INVITE_CACHE_TTL_JOINED", "86400"))
+INVITE_CACHE_TTL_ALREADY_MEMBER = float(os.getenv("INVITE_CACHE_TTL_ALREADY_MEMBER", "86400"))
+INVITE_CACHE_TTL_EXPIRED = float(os.getenv("INVITE_CACHE_TTL_EXPIRED", "604800"))
+INVITE_CACHE_TTL_INVALID = float(os.getenv("INVITE_CACHE_TTL_INVALID", "604800"))
+
+# Resolve private invites with CheckChatInviteRequest before joining, so
+# chats the user account already belongs to never cost a join request
+INVITE_PREFLIGHT = os.getenv("INVITE_PREFLIGHT", "1").lower() not in ("0", "false", "no")
+
+# Seconds between full dialog crawls of the user-account membership index;
+# in between it is kept current from ChatAction updates
+MEMBERSHIP_RESYNC_INTERVAL = float(os.getenv("MEMBERSHIP_RESYNC_INTERVAL", "86400"))
+
+# Bulk /join: input limits and how often the progress message is edited
+BULK_JOIN_MAX_LINKS = int(os.getenv("BULK_JOIN_MAX_LINKS", "500"))
+BULK_JOIN_MAX_FILE_SIZE = int(os.getenv("BULK_JOIN_MAX_FILE_SIZE", str(1024 * 1024)))
+BULK_JOIN_PROGRESS_INTERVAL = float(os.getenv("BULK_JOIN_PROGRESS_INTERVAL", "5"))
+
+# /list pagination: chats per page and how many rendered pages are cached
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+LIST_PAGE_CACHE_SIZE = int(os.getenv("LIST_PAGE_CACHE_SIZE", "32"))
+
+# Maximum log records waiting for the background writer; beyond this,
+# records are dropped (and counted) instead of blocking the event loop
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Log rotation: files roll over at midnight or when they reach LOG_MAX_BYTES;
+# LOG_BACKUP_COUNT rotated files are kept per log (gzipped if LOG_COMPRESS)
+LOG_DIRECTORY = "logs"
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "14"))
+LOG_COMPRESS = os.getenv("LOG_COMPRESS", "1").lower() not in ("0", "false", "no")
+LOG_FILES = ["bot.log", "error.log", "join_attempts.log", "broadcast_attempts.log"]
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BlockingSentinelQueueListener(QueueListener):
+    """QueueListener whose stop() waits for queue space instead of failing when full"""
+    
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+_queue_handler = None
+_queue_listener = None
+
+def _rotating_handler(filename: str, level: int, formatter: logging.Formatter) -> logging.Handler:
+    """Create a rotating file handler in the log directory"""
+    handler = SizedTimedRotatingFileHandler(
+        os.path.join(LOG_DIRECTORY, filename),
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        compress=LOG_COMPRESS
+    )
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
 def setup_logging():
     """Setup enhanced logging configuration"""
+    global _queue_handler, _queue_listener
+    
+    if _queue_listener is not None:
+        return
+    
     # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
     
     # Configure logging with more detailed format
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
+    formatter = logging.Formatter(log_format, date_format)
     
-    # File handler with rotation
-    log_filename = f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log'
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter(log_format, date_format))
+    # Main file handler, rotated daily and by size
+    file_handler = _rotating_handler("bot.log", logging.INFO, formatter)
     
     # Console handler with colored output for development
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter(log_format, date_format))
+    console_handler.setFormatter(formatter)
     
     # Error file handler for critical issues
-    error_filename = f'logs/error_{datetime.now().strftime("%Y%m%d")}.log'
-    error_handler = logging.FileHandler(error_filename, encoding='utf-8')
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(logging.Formatter(log_format, date_format))
-    
-    # Root logger configuration
-    logging.basicConfig(
-        level=logging.INFO,
-        handlers=[file_handler, console_handler, error_handler],
-        format=log_format,
-        datefmt=date_format
-    )
+    error_handler = _rotating_handler("error.log", logging.ERROR, formatter)
     
     # Reduce telegram library verbosity but keep important messages
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("telegram").setLevel(logging.INFO)
     logging.getLogger("telegram.ext").setLevel(logging.INFO)
     
-    # Add custom logger for join attempts
-    join_logger = logging.getLogger("join_attempts")
-    join_handler = logging.FileHandler(f'logs/join_attempts_{datetime.now().strftime("%Y%m%d")}.log', encoding='utf-8')
-    join_handler.setLevel(logging.INFO)
-    join_handler.setFormatter(logging.Formatter(log_format, date_format))
-    join_logger.addHandler(join_handler)
-    join_logger.setLevel(logging.INFO)
-    
-    # Add custom logger for broadcast attempts
-    broadcast_logger = logging.getLogger("broadcast_attempts")
-    broadcast_handler = logging.FileHandler(f'logs/broadcast_attempts_{datetime.now().strftime("%Y%m%d")}.log', encoding='utf-8')
-    broadcast_handler.setLevel(logging.INFO)
-    broadcast_handler.setFormatter(logging.Formatter(log_format, date_format))
-    broadcast_logger.addHandler(broadcast_handler)
-    broadcast_logger.setLevel(logging.INFO)
+    # File for join attempts (records from the "join_attempts" logger only)
+    logging.getLogger("join_attempts").setLevel(logging.INFO)
+    join_handler = _rotating_handler("join_attempts.log", logging.INFO, formatter)
+    join_handler.addFilter(logging.Filter("join_attempts"))
+    
+    # File for broadcast attempts (records from the "broadcast_attempts" logger only)
+    logging.getLogger("broadcast_attempts").setLevel(logging.INFO)
+    broadcast_handler = _rotating_handler("broadcast_attempts.log", logging.INFO, formatter)
+    broadcast_handler.addFilter(logging.Filter("broadcast_attempts"))
+    
+    # Loggers only enqueue records; a listener thread does the actual I/O
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_listener = BlockingSentinelQueueListener(
+        log_queue,
+        file_handler, console_handler, error_handler, join_handler, broadcast_handler,
+        respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(shutdown_logging)
+    
+    # Root logger configuration
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(_queue_handler)
     
     # Log startup information
     logger = logging.getLogger(__name__)
     logger.info("="*50)
     logger.info("Starting Telegram Auto-Join Bot")
-    logger.info(f"Log files: {log_filename}, {error_filename}")
+    logger.info(f"Log files: {file_handler.baseFilename}, {error_handler.baseFilename}")
+    logger.info(f"Log rotation: midnight or {LOG_MAX_BYTES} bytes, keeping {LOG_BACKUP_COUNT} files")
     logger.info(f"Bot token configured: {'Yes' if BOT_TOKEN else 'No'}")
     logger.info("="*50)
 
+def shutdown_logging():
+    """Stop the log listener, writing out every queued record"""
+    global _queue_listener
+    
+    if _queue_listener is None:
+        return
+    
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_listener.stop()
+    for handler in _queue_listener.handlers:
+        handler.flush()
+    _queue_listener = None
+    
+    if _queue_handler.dropped:
+        # Listener is gone, so report straight to the console
+        print(f"⚠️ {_queue_handler.dropped} log records dropped (queue full)")
+
+def get_log_queue_stats():
+    """Get queued and dropped record counts of the logging pipeline"""
+    if _queue_handler is None:
+        return {'queued': 0, 'dropped': 0}
+    return {'queued': _queue_handler.queue.qsize(), 'dropped': _queue_handler.dropped}
+
 def get_bot_info():
     """Get bot configuration information"""
     return {
         'bot_token_configured': bool(BOT_TOKEN),
-        'log_directory': 'logs',
-        'log_files': [
-            f'bot_{datetime.now().strftime("%Y%m%d")}.log',
-            f'error_{datetime.now().strftime("%Y%m%d")}.log',
-            f'join_attempts_{datetime.now().strftime("%Y%m%d")}.log',
-            f'broadcast_attempts_{datetime.now().strftime("%Y%m%d")}.log'
-        ]
+        'mode': BOT_MODE,
+        'update_concurrency': UPDATE_CONCURRENCY,
+        'log_directory': LOG_DIRECTORY,
+        'log_files': list(LOG_FILES),
+        'log_max_bytes': LOG_MAX_BYTES,
+        'log_backup_count': LOG_BACKUP_COUNT
     }
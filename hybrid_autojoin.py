@@ -6,15 +6,28 @@ Solusi untuk auto-join yang sesungguhnya bekerja
 import asyncio
 import logging
 import json
-import os
+import math
 from typing import List, Dict, Optional
 from telethon import TelegramClient
-from telethon.tl.functions.messages import ImportChatInviteRequest
+from telethon.tl.functions.messages import ImportChatInviteRequest, CheckChatInviteRequest
+from telethon.tl.types import ChatInvite, ChatInviteAlready
 from telethon.errors import UserAlreadyParticipantError, FloodWaitError
 from telethon.errors import InviteHashExpiredError, InviteHashInvalidError
-from utils import extract_invite_hash, validate_telegram_invite_link
+from telethon.utils import get_peer_id
+from config import INVITE_PREFLIGHT
+from user_account import USER_CONFIG_FILE, load_user_config, is_user_configured
+from session_store import SESSION_NAME, open_session
+from utils import parse_invite_link
 from chat_storage import chat_storage
-import re
+from join_pacer import join_pacer
+from membership_index import membership_index, entity_info
+from invite_cache import (
+    invite_cache,
+    OUTCOME_JOINED,
+    OUTCOME_ALREADY_MEMBER,
+    OUTCOME_EXPIRED,
+    OUTCOME_INVALID,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,46 +39,41 @@ class HybridAutoJoin:
     
     def __init__(self):
         self.user_client = None
+        self.me = None
         self.config = self.load_user_config()
-        self.session_file = 'user_session'
+        self.session_file = SESSION_NAME
+        self._setup_lock = asyncio.Lock()
         
     def load_user_config(self) -> Dict:
         """Load konfigurasi user account"""
-        config_file = 'user_telegram_config.json'
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
+        return load_user_config()
     
     def save_user_config(self, config: Dict):
         """Simpan konfigurasi user account"""
-        config_file = 'user_telegram_config.json'
-        with open(config_file, 'w') as f:
+        with open(USER_CONFIG_FILE, 'w') as f:
             json.dump(config, f, indent=2)
     
     def is_user_configured(self) -> bool:
         """Cek apakah user account sudah dikonfigurasi"""
-        return (self.config.get('api_id') and 
-                self.config.get('api_hash') and 
-                self.config.get('phone'))
+        return is_user_configured(self.config)
     
     async def setup_user_account(self) -> bool:
-        """Setup user account untuk auto-join"""
+        """Setup user account untuk auto-join (sekali saat bot start)"""
         try:
             if not self.is_user_configured():
                 return False
-                
-            # Buat client
-            self.user_client = TelegramClient(
-                self.session_file,
-                self.config['api_id'],
-                self.config['api_hash']
-            )
             
-            await self.user_client.connect()
+            # Buat client sekali saja, selanjutnya dipakai ulang
+            if self.user_client is None:
+                # Session di memori, snapshot ditulis berkala (bukan SQLite per update)
+                self.user_client = TelegramClient(
+                    open_session(self.session_file),
+                    self.config['api_id'],
+                    self.config['api_hash']
+                )
+            
+            if not self.user_client.is_connected():
+                await self.user_client.connect()
             
             # Cek apakah sudah authorized
             if not await self.user_client.is_user_authorized():
@@ -73,16 +81,53 @@ class HybridAutoJoin:
                 return False
             
             # Verifikasi user info
-            me = await self.user_client.get_me()
-            logger.info(f"User account ready: {me.first_name} (@{me.username})")
+            self.me = await self.user_client.get_me()
+            logger.info(f"User account ready: {self.me.first_name} (@{self.me.username})")
+            
+            # Index keanggotaan: crawl dialog hanya jika belum pernah/terlalu lama,
+            # selanjutnya diperbarui dari event ChatAction
+            try:
+                await membership_index.attach(self.user_client)
+            except Exception as e:
+                logger.error(f"Error syncing membership index: {e}")
             return True
             
         except Exception as e:
             logger.error(f"Error setting up user account: {e}")
             return False
     
-    async def join_group_with_user(self, invite_link: str) -> Dict:
-        """Join group menggunakan user account"""
+    async def ensure_ready(self) -> bool:
+        """
+        Pastikan client user account siap dipakai
+        
+        Client dibuat sekali; pemanggilan berikutnya hanya mengecek koneksi
+        dan reconnect jika terputus, tanpa handshake ulang.
+        """
+        async with self._setup_lock:
+            if self.user_client is None or self.me is None:
+                return await self.setup_user_account()
+            
+            if self.user_client.is_connected():
+                return True
+            
+            try:
+                logger.warning("User client disconnected, reconnecting...")
+                await self.user_client.connect()
+                return await self.user_client.is_user_authorized()
+            except Exception as e:
+                logger.error(f"Error reconnecting user account: {e}")
+                return False
+    
+    async def join_group_with_user(self, invite_link: str, max_wait: float = None) -> Dict:
+        """
+        Join group menggunakan user account
+        
+        Args:
+            invite_link (str): Link invite private
+            max_wait (float, optional): Batas detik menunggu slot pacer;
+                jika lebih lama, langsung dikembalikan sebagai rate limit
+                (untuk /join interaktif). None menunggu sampai slot tersedia
+        """
         result = {
             'success': False,
             'link': invite_link,
@@ -91,17 +136,45 @@ class HybridAutoJoin:
         }
         
         try:
-            # Ekstrak hash dari invite link
-            invite_hash = extract_invite_hash(invite_link)
-            if not invite_hash:
+            # Ekstrak hash dari invite link (hanya link private)
+            parsed_link = parse_invite_link(invite_link)
+            if not parsed_link.is_private:
                 result['error'] = "Format invite link tidak valid"
                 return result
+            invite_hash = parsed_link.value
+            
+            # Link yang sama sudah pernah dicoba: jawab dari cache tanpa request
+            cached = invite_cache.get(invite_hash)
+            if cached is not None:
+                cached['link'] = invite_link
+                cached['cached'] = True
+                logger.info(f"Invite result served from cache: {invite_hash} ({cached.get('outcome')})")
+                return cached
+            
+            # Index lokal tahu hash ini menuju chat yang sudah diikuti
+            if membership_index.is_member_via_invite(invite_hash):
+                return self._already_member(result, invite_hash)
             
             logger.info(f"User account attempting to join: {invite_hash}")
             
             # Join menggunakan user account
             try:
+                # Pre-flight: resolve invite dulu, tanpa memakai kuota join
+                invite = await self._check_invite(invite_hash) if INVITE_PREFLIGHT else None
+                if isinstance(invite, ChatInviteAlready):
+                    membership_index.add(get_peer_id(invite.chat), invite_hash, entity_info(invite.chat))
+                    result['group_info'] = self._group_info(invite.chat)
+                    return self._already_member(result, invite_hash)
+                
+                # Tunggu slot dari pacer adaptif sebelum request join
+                if not await join_pacer.wait(max_wait):
+                    wait_seconds = math.ceil(join_pacer.queued_delay())
+                    result['error'] = f"Rate limit, tunggu {wait_seconds} detik"
+                    result['flood_wait'] = wait_seconds
+                    logger.info(f"Join deferred by pacer ({wait_seconds}s): {invite_hash}")
+                    return result
                 updates = await self.user_client(ImportChatInviteRequest(invite_hash))
+                join_pacer.record_success()
                 
                 # Ambil info group
                 chat = None
@@ -110,39 +183,42 @@ class HybridAutoJoin:
                 
                 if chat:
                     result['success'] = True
-                    result['group_info'] = {
-                        'id': chat.id,
-                        'title': chat.title,
-                        'type': 'supergroup' if hasattr(chat, 'megagroup') else 'group',
-                        'participants_count': getattr(chat, 'participants_count', 0),
-                        'username': getattr(chat, 'username', None)
-                    }
+                    result['group_info'] = self._group_info(chat, invite)
+                    membership_index.add(get_peer_id(chat), invite_hash, entity_info(chat))
                     
                     # Simpan ke chat storage
                     if not chat_storage.is_chat_stored(chat.id):
                         chat_storage.add_chat(
                             chat_id=chat.id,
-                            chat_title=chat.title,
+                            chat_title=result['group_info']['title'],
                             chat_type=result['group_info']['type'],
-                            invite_link=invite_link
+                            invite_link=invite_link,
+                            participants_count=result['group_info']['participants_count']
                         )
                     
+                    result['outcome'] = OUTCOME_JOINED
+                    invite_cache.put(invite_hash, OUTCOME_JOINED, result)
                     logger.info(f"Successfully joined: {chat.title} (ID: {chat.id})")
                     
             except UserAlreadyParticipantError:
-                result['error'] = "Sudah menjadi anggota group"
-                logger.info(f"Already a member: {invite_link}")
+                return self._already_member(result, invite_hash)
                 
             except InviteHashExpiredError:
                 result['error'] = "Link invite sudah kedaluwarsa"
+                result['outcome'] = OUTCOME_EXPIRED
+                invite_cache.put(invite_hash, OUTCOME_EXPIRED, result)
                 logger.warning(f"Invite expired: {invite_link}")
                 
             except InviteHashInvalidError:
                 result['error'] = "Link invite tidak valid"
+                result['outcome'] = OUTCOME_INVALID
+                invite_cache.put(invite_hash, OUTCOME_INVALID, result)
                 logger.warning(f"Invalid invite: {invite_link}")
                 
             except FloodWaitError as e:
                 result['error'] = f"Rate limit, tunggu {e.seconds} detik"
+                result['flood_wait'] = e.seconds
+                join_pacer.record_flood(e.seconds)
                 logger.warning(f"Rate limited for {e.seconds} seconds")
                 
         except Exception as e:
@@ -151,17 +227,60 @@ class HybridAutoJoin:
         
         return result
     
+    async def _check_invite(self, invite_hash: str):
+        """
+        Resolve invite dengan CheckChatInviteRequest
+        
+        Returns:
+            ChatInviteAlready jika sudah anggota, ChatInvite/ChatInvitePeek
+            jika belum, atau None jika pre-flight kena FloodWait (join tetap
+            dicoba). Link expired/invalid dilempar sebagai exception Telethon.
+        """
+        try:
+            return await self.user_client(CheckChatInviteRequest(invite_hash))
+        except FloodWaitError as e:
+            logger.warning(f"Invite pre-flight rate limited ({e.seconds}s), joining without it")
+            return None
+    
+    @staticmethod
+    def _group_info(chat, invite=None) -> Dict:
+        """
+        Info group dari entity chat, dilengkapi data pre-flight
+        
+        Entity hasil ImportChatInviteRequest sering tanpa participants_count,
+        jadi jumlah anggota dan judul diambil dari ChatInvite bila ada.
+        """
+        preview = invite if isinstance(invite, ChatInvite) else None
+        return {
+            'id': chat.id,
+            'title': getattr(chat, 'title', None) or (preview.title if preview else 'Unknown'),
+            'type': 'supergroup' if hasattr(chat, 'megagroup') else 'group',
+            'participants_count': (getattr(chat, 'participants_count', None)
+                                   or (preview.participants_count if preview else 0)),
+            'username': getattr(chat, 'username', None)
+        }
+    
+    def _already_member(self, result: Dict, invite_hash: str) -> Dict:
+        """Tandai hasil sebagai sudah anggota dan simpan ke cache"""
+        result['error'] = "Sudah menjadi anggota group"
+        result['outcome'] = OUTCOME_ALREADY_MEMBER
+        invite_cache.put(invite_hash, OUTCOME_ALREADY_MEMBER, result)
+        logger.info(f"Already a member: {result['link']}")
+        return result
+    
     async def close(self):
         """Tutup user client"""
         if self.user_client:
             await self.user_client.disconnect()
+            self.user_client = None
+            self.me = None
 
 # Global instance
 hybrid_autojoin = HybridAutoJoin()
 
 async def setup_hybrid_system():
-    """Setup sistem hybrid"""
-    return await hybrid_autojoin.setup_user_account()
+    """Setup sistem hybrid (memakai ulang client yang sudah terhubung)"""
+    return await hybrid_autojoin.ensure_ready()
 
 async def join_with_user_account(invite_link: str) -> Dict:
     """Join group menggunakan user account"""
@@ -0,0 +1,109 @@
+"""
+Invite link result cache
+Remembers join outcomes per invite hash so repeated links skip the network
+"""
+
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import (
+    INVITE_CACHE_SIZE,
+    INVITE_CACHE_TTL_JOINED,
+    INVITE_CACHE_TTL_ALREADY_MEMBER,
+    INVITE_CACHE_TTL_EXPIRED,
+    INVITE_CACHE_TTL_INVALID,
+)
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_JOINED = "joined"
+OUTCOME_ALREADY_MEMBER = "already_member"
+OUTCOME_EXPIRED = "expired"
+OUTCOME_INVALID = "invalid"
+
+DEFAULT_TTLS = {
+    OUTCOME_JOINED: INVITE_CACHE_TTL_JOINED,
+    OUTCOME_ALREADY_MEMBER: INVITE_CACHE_TTL_ALREADY_MEMBER,
+    OUTCOME_EXPIRED: INVITE_CACHE_TTL_EXPIRED,
+    OUTCOME_INVALID: INVITE_CACHE_TTL_INVALID,
+}
+
+class InviteResultCache:
+    """
+    LRU cache of join results keyed by invite hash
+
+    Successful joins and definitive failures (expired, invalid, already a
+    member) are cached with a TTL per outcome. Transient failures such as
+    FloodWait are never cached.
+    """
+
+    def __init__(self, max_size: int = INVITE_CACHE_SIZE, ttls: Dict[str, float] = None):
+        """
+        Initialize cache
+
+        Args:
+            max_size (int): Maximum number of entries before LRU eviction
+            ttls (Dict[str, float], optional): Seconds to keep each outcome
+        """
+        self.max_size = max_size
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, invite_hash: str) -> Optional[Dict]:
+        """
+        Get the cached result for an invite hash
+
+        Args:
+            invite_hash (str): Invite hash from parse_invite_link
+
+        Returns:
+            Optional[Dict]: Copy of the cached join result, or None
+        """
+        entry = self._entries.get(invite_hash)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[invite_hash]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(invite_hash)
+        self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, invite_hash: str, outcome: str, result: Dict):
+        """
+        Cache a join result
+
+        Args:
+            invite_hash (str): Invite hash from parse_invite_link
+            outcome (str): One of the OUTCOME_* constants
+            result (Dict): Join result to return on later hits
+        """
+        ttl = self.ttls.get(outcome, 0)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._entries[invite_hash] = (time.monotonic() + ttl, copy.deepcopy(result))
+        self._entries.move_to_end(invite_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, invite_hash: str):
+        """Forget the result for an invite hash"""
+        self._entries.pop(invite_hash, None)
+
+    def stats(self) -> Dict:
+        """Cache size and hit/miss counters"""
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+# Global instance
+invite_cache = InviteResultCache()
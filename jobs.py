@@ -0,0 +1,170 @@
+"""
+Background job registry for long-running bot operations
+Runs /bc broadcasts and bulk /join outside the update handler with bounded concurrency and cancellation
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config import JOB_MAX_RUNNING
+
+logger = logging.getLogger(__name__)
+
+JOB_BROADCAST = "broadcast"
+JOB_BULK_JOIN = "bulk_join"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Every broadcast uses the whole global send rate, so they run one at a time
+KIND_LIMITS = {JOB_BROADCAST: 1}
+
+# Finished jobs kept for /jobs
+JOB_HISTORY_SIZE = 20
+
+class Job:
+    """One background job and its lifecycle timestamps"""
+
+    def __init__(self, job_id: int, kind: str, description: str, user_id: int):
+        self.id = job_id
+        self.kind = kind
+        self.description = description
+        self.user_id = user_id
+        self.state = JOB_QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Status message the job edits, if any
+        self.message = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    def elapsed(self) -> float:
+        """Seconds the job has been running (0 while queued)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class JobRegistry:
+    """
+    Owned registry of background jobs
+
+    start() returns immediately; the job's coroutine runs once a slot is
+    free. At most `max_running` jobs run at the same time, and kinds listed
+    in KIND_LIMITS have their own lower cap. A job's kind slot
+    is taken before the global one, so a broadcast waiting for the running
+    broadcast does not keep a bulk join from starting. Cancelling a job
+    cancels its task; the job coroutine handles CancelledError to leave its
+    work resumable.
+    """
+
+    def __init__(self, max_running: int = JOB_MAX_RUNNING, kind_limits: Dict[str, int] = None,
+                 history_size: int = JOB_HISTORY_SIZE):
+        self.max_running = max(1, max_running)
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._kind_slots = {kind: asyncio.Semaphore(limit) for kind, limit in (kind_limits or KIND_LIMITS).items()}
+        self._jobs: Dict[int, Job] = {}
+        self._history = deque(maxlen=history_size)
+        self._next_id = 1
+
+    def new_job(self, kind: str, description: str, user_id: int) -> Job:
+        """
+        Create a job with a fresh ID; it is registered once started
+
+        Args:
+            kind (str): Job kind (JOB_BROADCAST, JOB_BULK_JOIN)
+            description (str): Short text shown by /jobs
+            user_id (int): Telegram user who started the job
+
+        Returns:
+            Job: The new job
+        """
+        job = Job(self._next_id, kind, description, user_id)
+        self._next_id += 1
+        return job
+
+    def start(self, job: Job, run: Callable[[Job], Awaitable]) -> Job:
+        """
+        Queue a job; `run(job)` is awaited once a slot is free
+
+        The ID is known from new_job() before this call, so the handler can
+        put it in the status message the job will edit.
+        """
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, run), name=f"job-{job.id}-{job.kind}")
+        logger.info(f"Job #{job.id} ({job.kind}) queued by {job.user_id}: {job.description}")
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable]):
+        kind_slot = self._kind_slots.get(job.kind)
+        try:
+            if kind_slot is not None:
+                await kind_slot.acquire()
+            try:
+                async with self._slots:
+                    job.state = JOB_RUNNING
+                    job.started_at = time.time()
+                    logger.info(f"Job #{job.id} ({job.kind}) started")
+                    await run(job)
+            finally:
+                if kind_slot is not None:
+                    kind_slot.release()
+            job.state = JOB_DONE
+        except asyncio.CancelledError:
+            job.state = JOB_CANCELLED
+        except Exception as e:
+            job.state = JOB_FAILED
+            job.error = str(e)
+            logger.error(f"Job #{job.id} ({job.kind}) failed: {e}", exc_info=True)
+        finally:
+            job.finished_at = time.time()
+            self._jobs.pop(job.id, None)
+            self._history.append(job)
+            logger.info(f"Job #{job.id} ({job.kind}) {job.state} after {job.elapsed():.1f}s")
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """Get an active job"""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel an active job
+
+        Returns:
+            bool: False if no such job is queued or running
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    def active(self) -> List[Job]:
+        """Queued and running jobs, oldest first"""
+        return sorted(self._jobs.values(), key=lambda job: job.id)
+
+    def recent(self, limit: int = 5) -> List[Job]:
+        """Most recently finished jobs, newest first"""
+        return list(self._history)[-limit:][::-1]
+
+    async def shutdown(self):
+        """Cancel every active job and wait for them to clean up"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Cancelled {len(tasks)} background jobs on shutdown")
+
+# Global instance
+job_registry = JobRegistry()
@@ -0,0 +1,144 @@
+"""
+Adaptive pacing for user-account joins
+Widens the spacing between joins after FloodWait and narrows it slowly when quiet
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict
+
+from config import (
+    JOIN_PACER_BASE_INTERVAL,
+    JOIN_PACER_MIN_INTERVAL,
+    JOIN_PACER_MAX_INTERVAL,
+    JOIN_PACER_QUIET_PERIOD,
+)
+from persistence import json_writer
+
+logger = logging.getLogger(__name__)
+
+PACER_STATE_FILE = "join_pacer.json"
+
+# Interval multiplier after a FloodWait, and per quiet success
+BACKOFF_FACTOR = 2.0
+RECOVERY_FACTOR = 0.9
+
+# FloodWait events kept for the history
+HISTORY_SIZE = 50
+
+class AdaptivePacer:
+    """
+    Spacing between join requests of one user account
+
+    Every join waits until `interval` seconds after the previous one (and
+    past any active FloodWait). A FloodWait multiplies the interval by
+    BACKOFF_FACTOR; each success after JOIN_PACER_QUIET_PERIOD seconds
+    without a flood shrinks it by RECOVERY_FACTOR, never below the minimum.
+    State survives restarts in join_pacer.json.
+    """
+
+    def __init__(self, state_file: str = PACER_STATE_FILE,
+                 base_interval: float = JOIN_PACER_BASE_INTERVAL,
+                 min_interval: float = JOIN_PACER_MIN_INTERVAL,
+                 max_interval: float = JOIN_PACER_MAX_INTERVAL,
+                 quiet_period: float = JOIN_PACER_QUIET_PERIOD):
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.quiet_period = quiet_period
+        self.interval = base_interval
+        self.blocked_until = 0.0
+        self.last_join = 0.0
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._lock = asyncio.Lock()
+        self._load_state()
+
+    def _load_state(self):
+        """Load interval and FloodWait history from the state file"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.interval = self._clamp(state.get('interval', self.interval))
+            self.blocked_until = state.get('blocked_until', 0.0)
+            self.last_join = state.get('last_join', 0.0)
+            self.history.extend(tuple(event) for event in state.get('history', []))
+        except Exception as e:
+            logger.error(f"Error loading join pacer state: {e}")
+
+    def _save_state(self):
+        """Queue a write of the current state"""
+        json_writer.write(self.state_file, {
+            'interval': self.interval,
+            'blocked_until': self.blocked_until,
+            'last_join': self.last_join,
+            'history': [list(event) for event in self.history]
+        })
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def delay(self) -> float:
+        """Seconds until the next join may be sent"""
+        ready_at = max(self.blocked_until, self.last_join + self.interval)
+        return max(0.0, ready_at - time.time())
+
+    def queued_delay(self) -> float:
+        """Seconds until a join queued now may be sent, after the one already waiting"""
+        return self.delay() + (self.interval if self._lock.locked() else 0.0)
+
+    async def wait(self, max_wait: float = None) -> bool:
+        """
+        Wait for the next join slot and claim it
+
+        Args:
+            max_wait (float, optional): Give up instead of sleeping when the
+                slot is further away than this (interactive joins); None
+                waits as long as needed
+
+        Returns:
+            bool: True once the slot is claimed, False if it was given up
+        """
+        if max_wait is not None and self.queued_delay() > max_wait:
+            return False
+        async with self._lock:
+            delay = self.delay()
+            if max_wait is not None and delay > max_wait:
+                return False
+            if delay > 0:
+                logger.info(f"Join pacer: waiting {delay:.0f}s (interval {self.interval:.0f}s)")
+                await asyncio.sleep(delay)
+            self.last_join = time.time()
+        return True
+
+    def record_success(self):
+        """Narrow the interval slowly once there has been no flood for a while"""
+        last_flood = self.history[-1][0] if self.history else 0.0
+        if time.time() - last_flood >= self.quiet_period:
+            self.interval = self._clamp(self.interval * RECOVERY_FACTOR)
+        self._save_state()
+
+    def record_flood(self, seconds: int):
+        """Block until the FloodWait is over and widen the interval"""
+        now = time.time()
+        self.history.append((now, seconds))
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.interval = self._clamp(self.interval * BACKOFF_FACTOR)
+        logger.warning(f"Join pacer: FloodWait {seconds}s, interval widened to {self.interval:.0f}s")
+        self._save_state()
+
+    def stats(self) -> Dict:
+        """Current pacing state"""
+        return {
+            'interval': self.interval,
+            'next_join_in': self.delay(),
+            'floods_last_24h': sum(1 for ts, _ in self.history if time.time() - ts < 86400)
+        }
+
+# Global instance shared by HybridAutoJoin and UserAutoJoin (same account)
+join_pacer = AdaptivePacer()
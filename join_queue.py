@@ -0,0 +1,215 @@
+"""
+Persistent join job queue for user-account auto-join
+Stores every invite link with its state in SQLite and schedules joins around FloodWait
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from utils import parse_invite_link
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_FILE = "join_jobs.db"
+
+JOB_PENDING = "pending"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_RETRY = "retry"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS join_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    link TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_join_jobs_due ON join_jobs(state, retry_at);
+"""
+
+class JoinJobQueue:
+    """
+    Durable queue of invite links
+
+    Each link is one row in state pending, retry (with retry_at), done or
+    failed. A job only leaves pending/retry once its outcome is recorded,
+    so a restart simply picks up where the previous run stopped.
+    """
+
+    def __init__(self, db_file: str = JOB_QUEUE_FILE):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def add(self, links: Iterable[str]) -> int:
+        """
+        Queue links that are not in the queue yet
+
+        Links are stored in their normalized https://t.me/... form, so the
+        different spellings of one invite share a single job; unparseable
+        links are skipped. A link that failed earlier is queued again (its
+        failure may have been transient); pending, retry and done links are
+        left as they are.
+
+        Args:
+            links: Invite links in any format parse_invite_link accepts
+
+        Returns:
+            int: Number of newly queued or re-queued links
+        """
+        normalized = []
+        for link in links:
+            parsed_link = parse_invite_link(link)
+            if parsed_link.is_valid:
+                normalized.append(parsed_link.normalized)
+            else:
+                logger.warning(f"Skipping invalid invite link: {link}")
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO join_jobs (link, state, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(link) DO UPDATE SET state = excluded.state, retry_at = 0, error = NULL, "
+                "updated_at = excluded.updated_at WHERE join_jobs.state = ?",
+                [(link, JOB_PENDING, now, now, JOB_FAILED) for link in normalized]
+            )
+            return self._conn.total_changes - before
+
+    def next_due(self, now: float = None) -> Optional[Dict]:
+        """Oldest job that may run now, or None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM join_jobs WHERE state IN (?, ?) AND retry_at <= ? "
+                "ORDER BY retry_at, id LIMIT 1",
+                (JOB_PENDING, JOB_RETRY, now)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def next_wakeup(self) -> Optional[float]:
+        """Earliest time any unfinished job becomes due, None when the queue is drained"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(retry_at) FROM join_jobs WHERE state IN (?, ?)",
+                (JOB_PENDING, JOB_RETRY)
+            ).fetchone()
+        return row[0]
+
+    def _update(self, job_id: int, **fields):
+        """Update a job row"""
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE join_jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def mark_done(self, job: Dict, result: Dict):
+        """Record a successful join"""
+        self._update(job['id'], state=JOB_DONE, attempts=job['attempts'] + 1,
+                     error=None, result=json.dumps(result, ensure_ascii=False, default=str))
+
+    def mark_failed(self, job: Dict, error: str):
+        """Record a permanent failure"""
+        self._update(job['id'], state=JOB_FAILED, attempts=job['attempts'] + 1, error=error)
+
+    def mark_retry(self, job: Dict, retry_at: float, error: str):
+        """Reschedule a job for later"""
+        self._update(job['id'], state=JOB_RETRY, attempts=job['attempts'] + 1,
+                     retry_at=retry_at, error=error)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM join_jobs GROUP BY state").fetchall()
+        counts = {JOB_PENDING: 0, JOB_RETRY: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        counts.update({state: count for state, count in rows})
+        return counts
+
+class JoinScheduler:
+    """
+    Runs queued joins one at a time
+
+    The scheduler sleeps exactly until the next job is due, keeps at least
+    `min_interval` seconds between joins and moves FloodWait jobs to
+    retry-at `now + seconds` instead of giving up on them.
+    """
+
+    def __init__(self, queue: JoinJobQueue, join: Callable[[str], Awaitable[Dict]], min_interval: float = 30):
+        """
+        Initialize scheduler
+
+        Args:
+            queue (JoinJobQueue): Job queue
+            join: Coroutine function returning a join result dict; FloodWait
+                is reported as result['flood_wait'] (seconds)
+            min_interval (float): Minimum seconds between two joins
+        """
+        self.queue = queue
+        self.join = join
+        self.min_interval = min_interval
+        self._last_join = 0.0
+
+    async def run(self, on_result: Optional[Callable[[Dict, Dict], None]] = None) -> List[Dict]:
+        """
+        Process jobs until the queue is drained
+
+        Args:
+            on_result: Called as on_result(job, result) after every attempt
+
+        Returns:
+            List[Dict]: Results of every attempt made in this run
+        """
+        results = []
+
+        while True:
+            now = time.time()
+            job = self.queue.next_due(now)
+
+            if job is None:
+                wakeup = self.queue.next_wakeup()
+                if wakeup is None:
+                    return results
+                delay = max(0.0, wakeup - now)
+                logger.info(f"Next join job due in {delay:.0f} seconds")
+                await asyncio.sleep(delay)
+                continue
+
+            spacing = self._last_join + self.min_interval - time.monotonic()
+            if spacing > 0:
+                await asyncio.sleep(spacing)
+
+            result = await self.join(job['link'])
+            self._last_join = time.monotonic()
+            results.append(result)
+
+            flood_wait = result.get('flood_wait')
+            if result['success']:
+                self.queue.mark_done(job, result.get('group_info') or {})
+            elif flood_wait:
+                logger.warning(f"FloodWait {flood_wait}s, rescheduling {job['link']}")
+                self.queue.mark_retry(job, time.time() + flood_wait, result['error'])
+            else:
+                self.queue.mark_failed(job, result['error'] or "Unknown error")
+
+            if on_result:
+                on_result(job, result)
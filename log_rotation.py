@@ -0,0 +1,134 @@
+"""
+Log rotation for Telegram Auto-Join Bot
+File handler that rolls over at midnight or when a size limit is reached
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import threading
+from logging.handlers import TimedRotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+def _compress(source: str, dest: str, in_progress: set):
+    """Gzip `source` into `dest` and remove the source file"""
+    tmp_dest = dest + ".tmp"
+    try:
+        with open(source, 'rb') as f_in, gzip.open(tmp_dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp_dest, dest)
+        os.remove(source)
+    except Exception as e:
+        # Keep the uncompressed file rather than losing the logs
+        logger.error(f"Error compressing rotated log {source}: {e}")
+        try:
+            os.remove(tmp_dest)
+        except OSError:
+            pass
+    finally:
+        in_progress.discard(source)
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotating file handler with daily and size-based rollover
+
+    The active file keeps a fixed name (e.g. logs/bot.log). It is rotated at
+    midnight and whenever it would grow past `max_bytes`. Rotated files are
+    named after the day they cover (bot.log.2025-07-03, bot.log.2025-07-03.1,
+    ...), optionally gzipped in a background thread, and only the newest
+    `backup_count` of them are kept.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 0,
+                 compress: bool = True, encoding: str = 'utf-8'):
+        """
+        Initialize handler
+
+        Args:
+            filename (str): Active log file path
+            max_bytes (int): Size limit per file, 0 disables size rollover
+            backup_count (int): Rotated files to keep, 0 keeps all
+            compress (bool): Gzip rotated files in the background
+            encoding (str): File encoding
+        """
+        super().__init__(filename, when='midnight', backupCount=backup_count, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._compressing = set()
+        self.namer = self._unique_name
+        self.rotator = self._rotate
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0 or not os.path.isfile(self.baseFilename):
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        msg = f"{self.format(record)}\n"
+        self.stream.seek(0, 2)
+        return self.stream.tell() + len(msg.encode(self.encoding or 'utf-8')) >= self.max_bytes
+
+    def _unique_name(self, default_name: str) -> str:
+        """
+        Add a counter to the dated name when that day was already rotated
+
+        The counter continues after the highest one on disk, so names stay in
+        rotation order even after retention removed that day's older files.
+        """
+        extension = ".gz" if self.compress else ""
+        dir_name, base_name = os.path.split(default_name)
+        pattern = re.compile(re.escape(base_name) + r"(?:\.(\d+))?(?:\.gz)?(?:\.tmp)?")
+        highest = None
+        for name in os.listdir(dir_name or "."):
+            match = pattern.fullmatch(name)
+            if match:
+                highest = max(highest or 0, int(match.group(1) or 0))
+        if highest is None:
+            return default_name + extension
+        return f"{default_name}.{highest + 1}{extension}"
+
+    def _rotate(self, source: str, dest: str):
+        """Move the active file aside, then compress it off the logging thread"""
+        if not os.path.exists(source):
+            return
+        if not self.compress:
+            os.rename(source, dest)
+            return
+
+        plain_dest = dest[:-len(".gz")]
+        os.rename(source, plain_dest)
+        self._compressing.add(plain_dest)
+        threading.Thread(
+            target=_compress, args=(plain_dest, dest, self._compressing),
+            name="log-compressor", daemon=True
+        ).start()
+
+    def getFilesToDelete(self):
+        """
+        Rotated files beyond backup_count, oldest first
+
+        Files still being compressed count toward backup_count but are never
+        returned; the compressor removes them once their .gz is written.
+        """
+        dir_name, base_name = os.path.split(self.baseFilename)
+        prefix = base_name + "."
+        rotated = []
+        for name in os.listdir(dir_name):
+            path = os.path.join(dir_name, name)
+            if not name.startswith(prefix) or name.endswith(".tmp"):
+                continue
+            if path in self._compressing and os.path.exists(path + ".gz"):
+                # Compressed copy already written and counted
+                continue
+            try:
+                rotated.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        if len(rotated) <= self.backupCount:
+            return []
+        rotated.sort()
+        return [path for _, path in rotated[:len(rotated) - self.backupCount] if path not in self._compressing]
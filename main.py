@@ -14,26 +14,66 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    # Try importing with explicit path
     from telegram import Update
-    from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+    from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
     from telegram.error import NetworkError, TimedOut
 except ImportError as e:
     print(f"Error importing telegram: {e}")
-    print("Installing required packages...")
-    import subprocess
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "python-telegram-bot==22.2"])
-        from telegram import Update
-        from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-        from telegram.error import NetworkError, TimedOut
-    except Exception as e2:
-        print(f"Failed to install or import telegram: {e2}")
-        print("Please install manually: pip install python-telegram-bot==22.2")
-        sys.exit(1)
+    print("Please install the requirements: pip install -r requirements.txt")
+    sys.exit(1)
+
+from bot_handlers import start, help_command, join_command, join_document_command, broadcast_command, list_command, list_page_callback, jobs_command, cancel_command, handle_message
+from config import (
+    BOT_TOKEN,
+    BOT_MODE,
+    BOT_API_BASE_URL,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_LISTEN,
+    PORT,
+    USER_ACCOUNT_EAGER_START,
+    setup_logging,
+    shutdown_logging,
+    get_bot_info,
+)
+import user_account
+from chat_storage import chat_storage
+from broadcast_runs import broadcast_runs
+from update_processor import PerUserUpdateProcessor
+from jobs import job_registry
+
+# Update types our handlers consume: messages (commands, documents, access
+# codes) and inline button presses from /list
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+async def post_init(application: Application) -> None:
+    """Optionally connect the user account at startup; otherwise it loads on the first private /join"""
+    logger = logging.getLogger(__name__)
+    
+    if not user_account.is_user_configured():
+        logger.info("User account not configured - private group auto-join disabled")
+        return
+    
+    if not USER_ACCOUNT_EAGER_START:
+        logger.info("User account will be loaded on the first private group /join")
+        return
+    
+    hybrid_autojoin = await user_account.get_hybrid_autojoin()
+    if await hybrid_autojoin.setup_user_account():
+        logger.info("✅ User account client connected")
+    else:
+        logger.warning("User account client could not be started, will retry on first /join")
 
-from bot_handlers import start, help_command, join_command, broadcast_command, list_command, handle_message
-from config import BOT_TOKEN, setup_logging, get_bot_info
+async def post_stop(application: Application) -> None:
+    """Cancel background jobs while the bot can still edit their status messages"""
+    await job_registry.shutdown()
+
+async def post_shutdown(application: Application) -> None:
+    """Close the user account client and flush storage and broadcast state on shutdown"""
+    await user_account.close()
+    chat_storage.flush()
+    broadcast_runs.flush()
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -92,10 +132,30 @@ def main():
     bot_info = get_bot_info()
     logger.info(f"Bot configuration: {bot_info}")
     
+    mode = BOT_MODE
+    if mode not in ("polling", "webhook"):
+        logger.warning(f"Unknown BOT_MODE '{mode}', falling back to polling")
+        mode = "polling"
+    
+    if mode == "webhook" and (not WEBHOOK_URL or not WEBHOOK_SECRET):
+        logger.error("Webhook mode needs WEBHOOK_URL and WEBHOOK_SECRET")
+        print("❌ Error: BOT_MODE=webhook requires WEBHOOK_URL and WEBHOOK_SECRET!")
+        sys.exit(1)
+    
     try:
         # Create the Application
         logger.info("Creating Telegram application...")
-        application = Application.builder().token(BOT_TOKEN).build()
+        builder = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .concurrent_updates(PerUserUpdateProcessor())
+            .post_init(post_init)
+            .post_stop(post_stop)
+            .post_shutdown(post_shutdown)
+        )
+        if BOT_API_BASE_URL:
+            builder = builder.base_url(BOT_API_BASE_URL)
+        application = builder.build()
         
         # Add error handler
         application.add_error_handler(error_handler)
@@ -107,6 +167,15 @@ def main():
         application.add_handler(CommandHandler("join", join_command))
         application.add_handler(CommandHandler("bc", broadcast_command))
         application.add_handler(CommandHandler("list", list_command))
+        application.add_handler(CommandHandler("jobs", jobs_command))
+        application.add_handler(CommandHandler("cancel", cancel_command))
+        application.add_handler(CallbackQueryHandler(list_page_callback, pattern=r"^list:"))
+        
+        # Register document handler for bulk join link files
+        application.add_handler(MessageHandler(
+            filters.Document.FileExtension("txt") | filters.Document.FileExtension("csv"),
+            join_document_command
+        ))
         
         # Register message handler for authentication codes
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -118,22 +187,38 @@ def main():
         logger.info("  /start - Start the bot")
         logger.info("  /help - Show help message")
         logger.info("  /join [link] - Join group/channel")
+        logger.info("  /join [links...] or .txt/.csv upload - Bulk join")
         logger.info("  /bc [message] - Broadcast message")
         logger.info("  /list - List joined chats")
+        logger.info("  /jobs, /cancel [id] - Background jobs")
         
         # Run the bot
-        logger.info("🚀 Starting bot polling...")
+        logger.info(f"🚀 Starting bot ({mode})...")
         print("🤖 Telegram Auto-Join Bot is starting...")
         print("✅ Bot is ready and waiting for messages...")
         print("📊 Check logs/ directory for detailed logs")
         print("🛑 Press Ctrl+C to stop the bot")
         print("-" * 50)
         
-        # Start polling with enhanced error handling
-        application.run_polling(
-            allowed_updates=Update.ALL_TYPES,
-            drop_pending_updates=True,  # Clear pending updates on start
-        )
+        if mode == "webhook":
+            # Telegram pushes updates to us; requests without the secret
+            # token header are rejected by PTB's webhook server
+            logger.info(f"Webhook listening on {WEBHOOK_LISTEN}:{PORT}/{WEBHOOK_PATH}")
+            application.run_webhook(
+                listen=WEBHOOK_LISTEN,
+                port=PORT,
+                url_path=WEBHOOK_PATH,
+                webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=True,
+            )
+        else:
+            # Start polling with enhanced error handling
+            application.run_polling(
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=True,  # Clear pending updates on start
+            )
         
     except KeyboardInterrupt:
         logger.info("🛑 Bot stopped by user (Ctrl+C)")
@@ -141,13 +226,14 @@ def main():
     except Exception as e:
         logger.error(f"💥 Critical error during bot startup: {e}")
         print(f"❌ Critical error: {e}")
-        print("📋 Check logs/error_*.log for details")
+        print("📋 Check logs/error.log for details")
         raise
     finally:
         logger.info("="*60)
         logger.info("TELEGRAM AUTO-JOIN BOT SHUTDOWN")
         logger.info(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("="*60)
+        shutdown_logging()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,210 @@
+"""
+Membership index for the user account
+Local, persisted record of the chats the user account belongs to, kept current from Telethon updates
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from telethon import events
+from telethon.tl.types import Channel
+
+from config import MEMBERSHIP_RESYNC_INTERVAL
+from invite_cache import invite_cache
+from persistence import json_writer
+
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_FILE = "membership_index.json"
+
+def entity_info(entity) -> Dict:
+    """
+    Describe a Telethon chat entity
+
+    Args:
+        entity: Chat or Channel entity
+
+    Returns:
+        Dict: title, type (group, supergroup, channel), username and participants_count
+    """
+    if isinstance(entity, Channel):
+        chat_type = 'supergroup' if entity.megagroup else 'channel'
+    else:
+        chat_type = 'group'
+    return {
+        'title': getattr(entity, 'title', None) or 'Unknown',
+        'type': chat_type,
+        'username': getattr(entity, 'username', None),
+        'participants_count': getattr(entity, 'participants_count', None) or 0
+    }
+
+class MembershipIndex:
+    """
+    Chats the user account is a member of
+
+    Chat IDs are Telethon marked peer IDs (telethon.utils.get_peer_id), so
+    basic groups and channels never collide. Invite hashes that resolved to
+    a chat are remembered too, which lets a repeated invite be answered
+    without contacting Telegram at all.
+
+    The index is built once from iter_dialogs(), persisted to
+    membership_index.json and then updated from ChatAction events and our
+    own joins. Events missed while offline are covered by a full resync
+    every MEMBERSHIP_RESYNC_INTERVAL seconds.
+    """
+
+    def __init__(self, index_file: str = MEMBERSHIP_FILE, resync_interval: float = MEMBERSHIP_RESYNC_INTERVAL):
+        self.index_file = index_file
+        self.resync_interval = resync_interval
+        self.synced_at: Optional[float] = None
+        self._chats: Dict[int, Dict] = {}
+        self._invites: Dict[str, int] = {}
+        self._attached = set()
+        self._load()
+
+    def _load(self):
+        """Load the index from its file"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._chats = {int(chat_id): info for chat_id, info in data.get('chats', {}).items()}
+            self._invites = {invite_hash: int(chat_id) for invite_hash, chat_id in data.get('invites', {}).items()}
+            self.synced_at = data.get('synced_at')
+        except Exception as e:
+            logger.error(f"Error loading membership index: {e}")
+
+    def _snapshot(self) -> Dict:
+        """Serializable copy of the index, taken on the event loop thread"""
+        return {
+            'synced_at': self.synced_at,
+            'chats': {str(chat_id): dict(info) for chat_id, info in self._chats.items()},
+            'invites': dict(self._invites)
+        }
+
+    def _save(self):
+        """Queue a write; bursts of changes coalesce into one file write"""
+        json_writer.write(self.index_file, self._snapshot())
+
+    def _forget_invites(self, chat_ids):
+        """Drop invite hashes that no longer lead to a chat we belong to"""
+        stale = [h for h, chat_id in self._invites.items() if chat_id in chat_ids]
+        for invite_hash in stale:
+            del self._invites[invite_hash]
+            # A cached "joined"/"already member" answer would now be wrong
+            invite_cache.invalidate(invite_hash)
+
+    def add(self, chat_id: int, invite_hash: str = None, info: Dict = None):
+        """
+        Record membership of a chat
+
+        Args:
+            chat_id (int): Marked peer ID
+            invite_hash (str, optional): Invite hash that resolved to this chat
+            info (Dict, optional): Chat details from entity_info()
+        """
+        if info is not None or chat_id not in self._chats:
+            self._chats[chat_id] = dict(info or {})
+        if invite_hash:
+            self._invites[invite_hash] = chat_id
+        self._save()
+
+    def discard(self, chat_id: int):
+        """Forget a chat the user account left or was removed from"""
+        if self._chats.pop(chat_id, None) is not None:
+            self._forget_invites({chat_id})
+            self._save()
+
+    def is_member(self, chat_id: int) -> bool:
+        """Check if the user account belongs to a chat"""
+        return chat_id in self._chats
+
+    def chat_for_invite(self, invite_hash: str) -> Optional[int]:
+        """Chat ID an invite hash resolved to earlier, or None"""
+        return self._invites.get(invite_hash)
+
+    def is_member_via_invite(self, invite_hash: str) -> bool:
+        """Check if an invite hash leads to a chat we already belong to"""
+        chat_id = self._invites.get(invite_hash)
+        return chat_id is not None and chat_id in self._chats
+
+    def get_chat(self, chat_id: int) -> Optional[Dict]:
+        """Details of a chat we belong to, or None"""
+        info = self._chats.get(chat_id)
+        return dict(info, id=chat_id) if info is not None else None
+
+    def get_chats(self) -> List[Dict]:
+        """All chats we belong to, as dicts with an 'id' key"""
+        return [dict(info, id=chat_id) for chat_id, info in self._chats.items()]
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def needs_sync(self) -> bool:
+        """Check if a full dialog crawl is due"""
+        return self.synced_at is None or time.time() - self.synced_at >= self.resync_interval
+
+    async def sync_from_dialogs(self, client):
+        """
+        Rebuild the index from the account's dialogs
+
+        Invite hashes pointing at chats we still belong to are kept.
+
+        Args:
+            client: Connected, authorized TelegramClient
+        """
+        chats = {}
+        async for dialog in client.iter_dialogs():
+            if dialog.is_group or dialog.is_channel:
+                chats[dialog.id] = entity_info(dialog.entity)
+
+        self._chats = chats
+        self._forget_invites({chat_id for chat_id in self._invites.values() if chat_id not in chats})
+        self.synced_at = time.time()
+        self._save()
+        logger.info(f"Membership index synced from dialogs: {len(chats)} chats")
+
+    async def attach(self, client):
+        """
+        Sync if due and keep the index current from the client's updates
+
+        Safe to call repeatedly; handlers are registered once per client.
+
+        Args:
+            client: Connected, authorized TelegramClient
+        """
+        if self.needs_sync():
+            await self.sync_from_dialogs(client)
+
+        if id(client) in self._attached:
+            return
+        me = await client.get_me(input_peer=True)
+        client.add_event_handler(
+            lambda event: self._on_chat_action(event, me.user_id),
+            events.ChatAction()
+        )
+        self._attached.add(id(client))
+
+    async def _on_chat_action(self, event, my_id: int):
+        """Apply joins, leaves and kicks that concern our own account"""
+        if event.created or event.new_title:
+            if event.chat_id in self._chats or event.created:
+                self.add(event.chat_id, info=entity_info(await event.get_chat()))
+            return
+
+        if my_id not in event.user_ids:
+            return
+
+        if event.user_joined or event.user_added:
+            self.add(event.chat_id, info=entity_info(await event.get_chat()))
+            logger.info(f"Membership index: joined {event.chat_id}")
+        elif event.user_left or event.user_kicked:
+            self.discard(event.chat_id)
+            logger.info(f"Membership index: left {event.chat_id}")
+
+# Global instance
+membership_index = MembershipIndex()
@@ -0,0 +1,127 @@
+"""
+Persistence helpers for Telegram Auto-Join Bot
+Serialises JSON file writes on one background thread with atomic replace
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+def atomic_write_json(path: str, data: Any, indent: int = 2):
+    """
+    Write JSON to a temp file next to `path` and rename it into place
+
+    Readers never see a half-written file, even if the process dies mid-write.
+
+    Args:
+        path (str): Target file
+        data (Any): JSON-serialisable data
+        indent (int): JSON indentation
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+Payload = Union[Any, Callable[[], Any]]
+
+class JsonWriter:
+    """
+    Single writer thread for JSON files
+
+    Writes are queued per path; if a path already has a queued write, its
+    payload is replaced, so only the newest state hits the disk. A payload
+    may be a callable, which is evaluated on the writer thread to take the
+    snapshot as late as possible.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: Dict[str, Tuple[Payload, Future]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        """Start the writer thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="json-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Writer thread main loop"""
+        while True:
+            item = self._queue.get()
+            if isinstance(item, Future):
+                # Flush marker: everything queued before it has been written
+                item.set_result(None)
+                continue
+            self._write_pending(item)
+
+    def _write_pending(self, path: str):
+        """Write the newest queued payload for a path"""
+        with self._lock:
+            payload, future = self._pending.pop(path)
+        try:
+            data = payload() if callable(payload) else payload
+            atomic_write_json(path, data)
+            future.set_result(path)
+        except Exception as e:
+            logger.error(f"Error writing {path}: {e}")
+            future.set_exception(e)
+
+    def write(self, path: str, payload: Payload) -> Future:
+        """
+        Queue a JSON write
+
+        Args:
+            path (str): Target file
+            payload: Data to write, or a callable returning it
+
+        Returns:
+            Future: Resolved once the file is written
+        """
+        with self._lock:
+            if path in self._pending:
+                future = self._pending[path][1]
+                self._pending[path] = (payload, future)
+                return future
+            future = Future()
+            self._pending[path] = (payload, future)
+            self._ensure_thread()
+        self._queue.put(path)
+        return future
+
+    async def write_async(self, path: str, payload: Payload):
+        """Queue a JSON write and wait for it without blocking the event loop"""
+        await asyncio.wrap_future(self.write(path, payload))
+
+    def flush(self, timeout: float = None):
+        """Block until every write queued so far is on disk"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        marker = Future()
+        self._queue.put(marker)
+        marker.result(timeout)
+
+# Global instance
+json_writer = JsonWriter()
+atexit.register(json_writer.flush)
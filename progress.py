@@ -0,0 +1,141 @@
+"""
+Live progress messages for long-running bot operations
+Edits one status message periodically with counts, rate and ETA
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from telegram.error import TelegramError
+
+from config import BROADCAST_PROGRESS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as M:SS or H:MM:SS"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+class ProgressReporter:
+    """
+    Throttled progress display for a status message
+
+    Results are counted synchronously with record(), which is cheap enough
+    for engine callbacks. A background task renders the text every
+    `interval` seconds and edits the message only when items were processed
+    since the last edit and the text changed.
+    When a token bucket is given, every edit takes a token from it, so
+    progress edits count against the same rate budget as the work itself.
+    """
+
+    def __init__(self, message, total: int, title: str, footer: str = "",
+                 interval: float = BROADCAST_PROGRESS_INTERVAL, bucket=None, done: int = 0):
+        """
+        Initialize reporter
+
+        Args:
+            message: Telegram message to edit
+            total (int): Total number of items, including already processed ones
+            title (str): First line of the status text
+            footer (str, optional): Text appended below the counters
+            interval (float): Minimum seconds between two edits
+            bucket (TokenBucket, optional): Rate limiter shared with the work
+            done (int): Items already processed before this reporter started
+        """
+        self.message = message
+        self.total = total
+        self.title = title
+        self.footer = footer
+        self.interval = interval
+        self.bucket = bucket
+        self.initial_done = done
+        self.success = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._last_text: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, success: bool):
+        """Count one processed item"""
+        if success:
+            self.success += 1
+        else:
+            self.failed += 1
+
+    @property
+    def processed(self) -> int:
+        """Items processed since the reporter started"""
+        return self.success + self.failed
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.initial_done - self.processed)
+
+    def elapsed(self) -> float:
+        """Seconds since the reporter started"""
+        return time.monotonic() - self._started
+
+    def rate(self) -> float:
+        """Items per second since the reporter started"""
+        elapsed = self.elapsed()
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def render(self) -> str:
+        """Current status text"""
+        rate = self.rate()
+        eta = format_duration(self.remaining / rate) if rate > 0 else "-"
+        text = (
+            f"{self.title}\n\n"
+            f"✅ Berhasil: {self.success}\n"
+            f"❌ Gagal: {self.failed}\n"
+            f"⏳ Sisa: {self.remaining}/{self.total}\n"
+            f"⚡ Kecepatan: {rate:.1f}/detik\n"
+            f"🕒 ETA: {eta}"
+        )
+        if self.footer:
+            text += f"\n\n{self.footer}"
+        return text
+
+    async def _edit(self, text: str):
+        """Edit the status message unless the text is unchanged"""
+        if text == self._last_text:
+            return
+        if self.bucket is not None:
+            await self.bucket.acquire()
+        try:
+            await self.message.edit_text(text)
+            self._last_text = text
+        except TelegramError as e:
+            logger.warning(f"Could not update progress message: {e}")
+
+    async def _loop(self):
+        last_processed = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            # Rate and ETA drift even when nothing happens; only edit on progress
+            if self.processed == last_processed:
+                continue
+            last_processed = self.processed
+            await self._edit(self.render())
+
+    def start(self):
+        """Start periodic edits"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop periodic edits (the caller sends the final text)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
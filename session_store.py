@@ -0,0 +1,296 @@
+"""
+In-memory Telethon session with snapshot persistence
+Keeps auth key, entity cache and update state in memory and writes a JSON snapshot periodically and on close
+"""
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from telethon.crypto import AuthKey
+from telethon.sessions import MemorySession, StringSession
+from telethon.tl import types
+from telethon.utils import get_peer_id
+
+from config import SESSION_SNAPSHOT_INTERVAL, USER_SESSION_STRING
+from persistence import atomic_write_json, json_writer
+
+logger = logging.getLogger(__name__)
+
+SESSION_NAME = "user_session"
+SNAPSHOT_VERSION = 1
+
+EntityRow = Tuple[int, int, Optional[str], Optional[str], Optional[str]]
+
+def snapshot_path(name: str = SESSION_NAME) -> str:
+    return f"{name}.json"
+
+def legacy_session_path(name: str = SESSION_NAME) -> str:
+    """SQLite session file Telethon creates for a session name"""
+    return f"{name}.session"
+
+class SnapshotSession(MemorySession):
+    """
+    Telethon session that lives in memory
+
+    Telethon's default SQLiteSession commits entity and update-state rows
+    on the event loop. Here the state is kept in dicts (entities indexed by
+    ID, username and phone) and loaded once: from the JSON snapshot, else
+    the legacy SQLite session file, else a StringSession (USER_SESSION_STRING).
+    Telethon calls save() after auth/DC changes and about once a minute;
+    a snapshot is written through json_writer only when something changed,
+    at most every `interval` seconds except for auth changes, and always
+    on close().
+    """
+
+    def __init__(self, name: str = SESSION_NAME, interval: float = SESSION_SNAPSHOT_INTERVAL,
+                 string: str = None, load: bool = True):
+        """
+        Initialize session
+
+        Args:
+            name (str): Session name; the snapshot is stored in <name>.json
+            interval (float): Minimum seconds between two snapshot writes
+            string (str, optional): StringSession to start from when no
+                snapshot exists, defaults to USER_SESSION_STRING
+            load (bool): Load the stored state (False starts empty)
+        """
+        super().__init__()
+        self.name = name
+        self.path = snapshot_path(name)
+        self.interval = interval
+        self._rows: Dict[int, EntityRow] = {}
+        self._by_username: Dict[str, int] = {}
+        self._by_phone: Dict[str, int] = {}
+        self._dirty = False
+        self._urgent = False
+        self._last_write = 0.0
+        if load:
+            self._load(string if string is not None else USER_SESSION_STRING)
+
+    # Loading
+
+    def _load(self, string: str):
+        """Load the state once, from the first source available"""
+        try:
+            if os.path.exists(self.path):
+                self._load_snapshot()
+                return
+            if os.path.exists(legacy_session_path(self.name)):
+                self._load_legacy()
+            elif string:
+                self._load_string(string)
+            else:
+                return
+        except Exception as e:
+            logger.error(f"Error loading session {self.name}: {e}")
+            return
+        # Persist what was imported so the next start reads the snapshot
+        self._dirty = self._urgent = True
+        self.save()
+
+    def _load_snapshot(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._dc_id = data.get("dc_id") or 0
+        self._server_address = data.get("server_address")
+        self._port = data.get("port")
+        self._takeout_id = data.get("takeout_id")
+        if data.get("auth_key"):
+            self._auth_key = AuthKey(base64.b64decode(data["auth_key"]))
+        for row in data.get("entities", []):
+            self._put_row(tuple(row))
+        for entity_id, (pts, qts, date, seq) in data.get("update_states", {}).items():
+            self._update_states[int(entity_id)] = types.updates.State(
+                pts, qts, datetime.fromtimestamp(date, tz=timezone.utc), seq, unread_count=0
+            )
+        logger.info(f"Session {self.name} loaded from snapshot ({len(self._rows)} entities)")
+
+    def _load_legacy(self):
+        """Import a SQLite session written by Telethon's default session (read-only)"""
+        path = legacy_session_path(self.name)
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT dc_id, server_address, port, auth_key, takeout_id FROM sessions").fetchone()
+            if row:
+                self._dc_id, self._server_address, self._port, key, self._takeout_id = row
+                if key:
+                    self._auth_key = AuthKey(key)
+            for row in conn.execute("SELECT id, hash, username, phone, name FROM entities"):
+                self._put_row(tuple(row))
+            for entity_id, pts, qts, date, seq in conn.execute("SELECT id, pts, qts, date, seq FROM update_state"):
+                self._update_states[entity_id] = types.updates.State(
+                    pts, qts, datetime.fromtimestamp(date, tz=timezone.utc), seq, unread_count=0
+                )
+        finally:
+            conn.close()
+        logger.info(f"Session {self.name} imported from {path} ({len(self._rows)} entities)")
+
+    def _load_string(self, string: str):
+        """Take DC and auth key from a StringSession"""
+        source = StringSession(string)
+        self._dc_id = source.dc_id
+        self._server_address = source.server_address
+        self._port = source.port
+        self._auth_key = source.auth_key
+        logger.info(f"Session {self.name} imported from StringSession")
+
+    # Persistence
+
+    def _snapshot(self) -> Dict:
+        """Copy of the state, taken on the event loop thread"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "dc_id": self._dc_id,
+            "server_address": self._server_address,
+            "port": self._port,
+            "takeout_id": self._takeout_id,
+            "auth_key": base64.b64encode(self._auth_key.key).decode('ascii') if self._auth_key else None,
+            "entities": list(self._rows.values()),
+            "update_states": {
+                str(entity_id): [state.pts, state.qts, int(state.date.timestamp()), state.seq]
+                for entity_id, state in self._update_states.items()
+            },
+        }
+
+    def save(self):
+        """Queue a snapshot write if the state changed and one is due"""
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not self._urgent and now - self._last_write < self.interval:
+            return
+        json_writer.write(self.path, self._snapshot())
+        self._dirty = self._urgent = False
+        self._last_write = now
+
+    def close(self):
+        """Write pending changes and wait for them to reach the disk"""
+        self._urgent = True
+        self.save()
+        json_writer.flush(timeout=10)
+
+    def delete(self):
+        """Forget the session (log out)"""
+        for path in (self.path, legacy_session_path(self.name)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._rows.clear()
+        self._by_username.clear()
+        self._by_phone.clear()
+        self._update_states.clear()
+        self._auth_key = None
+        self._dirty = False
+
+    # Auth and update state
+
+    def set_dc(self, dc_id, server_address, port):
+        super().set_dc(dc_id, server_address, port)
+        self._dirty = self._urgent = True
+
+    @MemorySession.auth_key.setter
+    def auth_key(self, value):
+        self._auth_key = value
+        self._dirty = self._urgent = True
+
+    @MemorySession.takeout_id.setter
+    def takeout_id(self, value):
+        self._takeout_id = value
+        self._dirty = self._urgent = True
+
+    def set_update_state(self, entity_id, state):
+        current = self._update_states.get(entity_id)
+        if current is not None and (current.pts, current.qts, current.seq) == (state.pts, state.qts, state.seq):
+            return
+        self._update_states[entity_id] = state
+        self._dirty = True
+
+    # Entity cache
+
+    def _put_row(self, row: EntityRow) -> bool:
+        """Insert or replace an entity row; returns True if anything changed"""
+        entity_id, _, username, phone, _ = row
+        old = self._rows.get(entity_id)
+        if old == row:
+            return False
+        if old is not None:
+            if old[2] and self._by_username.get(old[2]) == entity_id:
+                del self._by_username[old[2]]
+            if old[3] and self._by_phone.get(old[3]) == entity_id:
+                del self._by_phone[old[3]]
+        self._rows[entity_id] = row
+        if username:
+            self._by_username[username] = entity_id
+        if phone:
+            self._by_phone[phone] = entity_id
+        return True
+
+    def process_entities(self, tlo):
+        changed = False
+        for row in self._entities_to_rows(tlo):
+            changed = self._put_row(row) or changed
+        if changed:
+            self._dirty = True
+
+    def _lookup(self, entity_id: Optional[int]):
+        row = self._rows.get(entity_id) if entity_id is not None else None
+        return (row[0], row[1]) if row else None
+
+    def get_entity_rows_by_phone(self, phone):
+        return self._lookup(self._by_phone.get(phone))
+
+    def get_entity_rows_by_username(self, username):
+        return self._lookup(self._by_username.get(username))
+
+    def get_entity_rows_by_name(self, name):
+        return next(((row[0], row[1]) for row in self._rows.values() if row[4] == name), None)
+
+    def get_entity_rows_by_id(self, id, exact=True):
+        if exact:
+            return self._lookup(id)
+        for marked_id in (get_peer_id(types.PeerUser(id)), get_peer_id(types.PeerChat(id)),
+                          get_peer_id(types.PeerChannel(id))):
+            result = self._lookup(marked_id)
+            if result:
+                return result
+        return None
+
+def open_session(name: str = SESSION_NAME) -> SnapshotSession:
+    """Session object to pass to TelegramClient instead of a file name"""
+    return SnapshotSession(name)
+
+def export_string(name: str = SESSION_NAME) -> str:
+    """
+    Export the stored session as a StringSession string
+
+    Returns:
+        str: String for USER_SESSION_STRING, empty if not logged in
+    """
+    return StringSession.save(SnapshotSession(name, string=""))
+
+def import_string(string: str, name: str = SESSION_NAME):
+    """Replace the stored session with the auth key of a StringSession"""
+    session = SnapshotSession(name, load=False)
+    session._load_string(string)
+    atomic_write_json(session.path, session._snapshot())
+
+if __name__ == "__main__":
+    # python session_store.py export          -> print StringSession for USER_SESSION_STRING
+    # python session_store.py import <string> -> write user_session.json from a StringSession
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        exported = export_string()
+        if not exported:
+            sys.exit("No logged-in session found")
+        print(exported)
+    elif len(sys.argv) == 3 and sys.argv[1] == "import":
+        import_string(sys.argv[2])
+        print(f"Session written to {snapshot_path()}")
+    else:
+        sys.exit("Usage: python session_store.py export | import <string>")
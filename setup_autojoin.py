@@ -7,6 +7,7 @@ import os
 import asyncio
 from telethon import TelegramClient
 from telethon.errors import SessionPasswordNeededError
+from session_store import open_session
 
 def setup_user_credentials():
     """Setup kredensial user account"""
@@ -67,7 +68,7 @@ async def verify_and_login(config):
         
         # Buat client
         client = TelegramClient(
-            'user_session',
+            open_session(),
             config['api_id'],
             config['api_hash']
         )
@@ -0,0 +1,241 @@
+"""
+SQLite backend for chat storage
+Keeps chats in an indexed table (WAL mode) and migrates chat_storage.json
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from typing import List, Dict, Optional
+
+from utils import invite_key
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FILE = "chat_storage.db"
+JSON_FILE = "chat_storage.json"
+
+# chat_id is the INTEGER PRIMARY KEY, so lookups by ID use the rowid index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    invite_link TEXT,
+    invite_hash TEXT,
+    participants_count INTEGER,
+    joined_at TEXT,
+    last_broadcast TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chats_type ON chats(type);
+CREATE INDEX IF NOT EXISTS idx_chats_last_broadcast ON chats(last_broadcast);
+"""
+
+# Created after _upgrade_schema, since older databases lack the column
+INVITE_INDEX = "CREATE INDEX IF NOT EXISTS idx_chats_invite_hash ON chats(invite_hash)"
+
+# Columns added after the first release: name -> SQL type
+ADDED_COLUMNS = {
+    "invite_hash": "TEXT",
+    "participants_count": "INTEGER",
+}
+
+COLUMNS = "chat_id, title, type, invite_link, invite_hash, participants_count, joined_at, last_broadcast"
+PLACEHOLDERS = ", ".join("?" * len(COLUMNS.split(", ")))
+
+def _row_to_chat_data(row: sqlite3.Row) -> Dict:
+    """Convert a table row into the public chat dict"""
+    return {
+        "chat_id": row["chat_id"],
+        "title": row["title"],
+        "type": row["type"],
+        "invite_link": row["invite_link"],
+        "invite_hash": row["invite_hash"],
+        "participants_count": row["participants_count"],
+        "joined_at": row["joined_at"],
+        "last_broadcast": row["last_broadcast"]
+    }
+
+def connect(db_file: str = SQLITE_FILE) -> sqlite3.Connection:
+    """
+    Open the chat database in WAL mode and make sure the schema exists
+
+    Args:
+        db_file (str): Path to the SQLite database
+
+    Returns:
+        sqlite3.Connection: Connection usable from any thread (guard with a lock)
+    """
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _upgrade_schema(conn)
+    conn.execute(INVITE_INDEX)
+    return conn
+
+def _upgrade_schema(conn: sqlite3.Connection):
+    """Add columns missing from databases created by older versions"""
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(chats)")}
+    with conn:
+        for name, sql_type in ADDED_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE chats ADD COLUMN {name} {sql_type}")
+                logger.info(f"Added column chats.{name}")
+
+        # Backfill the invite index for rows stored before the column existed
+        if "invite_hash" not in existing:
+            rows = conn.execute("SELECT chat_id, invite_link FROM chats WHERE invite_link IS NOT NULL").fetchall()
+            conn.executemany(
+                "UPDATE chats SET invite_hash = ? WHERE chat_id = ?",
+                [(invite_key(row["invite_link"]), row["chat_id"]) for row in rows]
+            )
+
+def _chat_row(chat_id: int, chat_info: Dict) -> tuple:
+    """Parameters for an INSERT of COLUMNS"""
+    return (chat_id, chat_info.get("title", "Unknown"), chat_info.get("type", "unknown"),
+            chat_info.get("invite_link"), chat_info.get("invite_hash") or invite_key(chat_info.get("invite_link")),
+            chat_info.get("participants_count"),
+            chat_info.get("joined_at"), chat_info.get("last_broadcast"))
+
+class SqliteChatBackend:
+    """Chat backend storing one row per chat in SQLite"""
+
+    def __init__(self, db_file: str = SQLITE_FILE, json_file: str = JSON_FILE):
+        self.db_file = db_file
+        is_new = not os.path.exists(db_file)
+        self._lock = threading.Lock()
+        self._conn = connect(db_file)
+
+        # First start on SQLite: carry over the existing JSON data once
+        if is_new and os.path.exists(json_file):
+            migrate_json_to_sqlite(json_file, conn=self._conn)
+
+    def flush(self):
+        """Every write is committed immediately, nothing to flush"""
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def put_chat(self, chat_id: int, chat_info: Dict):
+        """Insert or replace a chat record"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO chats ({COLUMNS}) VALUES ({PLACEHOLDERS})",
+                _chat_row(chat_id, chat_info)
+            )
+
+    def put_chats(self, chats: Dict[int, Dict]):
+        """Insert or replace several chat records in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO chats ({COLUMNS}) VALUES ({PLACEHOLDERS})",
+                [_chat_row(chat_id, chat_info) for chat_id, chat_info in chats.items()]
+            )
+
+    def delete_chat(self, chat_id: int) -> Optional[Dict]:
+        """Delete a chat record, returning it if it existed"""
+        with self._lock, self._conn:
+            row = self._conn.execute(f"SELECT {COLUMNS} FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM chats WHERE chat_id = ?", (chat_id,))
+        return _row_to_chat_data(row)
+
+    def get_chat(self, chat_id: int) -> Optional[Dict]:
+        """Get a single chat record"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {COLUMNS} FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        return _row_to_chat_data(row) if row is not None else None
+
+    def get_chat_by_invite(self, invite_hash: str) -> Optional[Dict]:
+        """Get the chat record joined through an invite hash"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {COLUMNS} FROM chats WHERE invite_hash = ? LIMIT 1", (invite_hash,)
+            ).fetchone()
+        return _row_to_chat_data(row) if row is not None else None
+
+    def get_all_chats(self) -> List[Dict]:
+        """Get all chat records"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {COLUMNS} FROM chats").fetchall()
+        return [_row_to_chat_data(row) for row in rows]
+
+    def get_chat_count(self) -> int:
+        """Get number of chat records"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+
+    def is_chat_stored(self, chat_id: int) -> bool:
+        """Check whether a chat record exists"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        return row is not None
+
+    def set_last_broadcast(self, chat_id: int, timestamp: str):
+        """Set the last broadcast timestamp of a chat"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE chats SET last_broadcast = ? WHERE chat_id = ?", (timestamp, chat_id))
+
+    def set_last_broadcast_many(self, chat_ids: List[int], timestamp: str):
+        """Set the last broadcast timestamp of several chats in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chats SET last_broadcast = ? WHERE chat_id = ?",
+                [(timestamp, chat_id) for chat_id in chat_ids]
+            )
+
+def migrate_json_to_sqlite(json_file: str = JSON_FILE, db_file: str = SQLITE_FILE,
+                           conn: sqlite3.Connection = None) -> int:
+    """
+    Copy chats from chat_storage.json into the SQLite database
+
+    Existing rows are kept, so running the migration twice is harmless.
+
+    Args:
+        json_file (str): Source JSON storage file
+        db_file (str): Target SQLite database (ignored when conn is given)
+        conn (sqlite3.Connection, optional): Already open connection
+
+    Returns:
+        int: Number of chats inserted
+    """
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            chats = json.load(f).get("chats", {})
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Cannot read {json_file} for migration: {e}")
+        return 0
+
+    rows = [_chat_row(int(chat_id), info) for chat_id, info in chats.items()]
+
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_file)
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(f"INSERT OR IGNORE INTO chats ({COLUMNS}) VALUES ({PLACEHOLDERS})", rows)
+            inserted = conn.total_changes - before
+    finally:
+        if own_conn:
+            conn.close()
+
+    logger.info(f"Migrated {inserted}/{len(rows)} chats from {json_file} to SQLite")
+    return inserted
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else JSON_FILE
+    target = sys.argv[2] if len(sys.argv) > 2 else SQLITE_FILE
+    count = migrate_json_to_sqlite(source, target)
+    print(f"✅ {count} chat dimigrasikan dari {source} ke {target}")
+    print("Set CHAT_STORAGE_BACKEND=sqlite untuk menggunakan database ini")
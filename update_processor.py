@@ -0,0 +1,125 @@
+"""
+Concurrent update processing for the bot application
+Runs updates of different users in parallel while keeping each user's own updates in order
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from config import UPDATE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Updates that waited longer than this (seconds) are logged
+SLOW_WAIT_WARNING = 5.0
+
+def update_key(update: object) -> Optional[int]:
+    """
+    Ordering key of an update: the user who sent it, else the chat it belongs to
+
+    Returns:
+        Optional[int]: Key, or None for updates that need no ordering
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user:
+        return update.effective_user.id
+    if update.effective_chat:
+        return update.effective_chat.id
+    return None
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor with per-user ordering and a global concurrency cap
+
+    Every update first takes the lock of its user (or chat), then one of
+    `max_concurrent_updates` global slots. asyncio locks are FIFO, so one
+    user's commands run in the order they arrived, while other users are
+    served in parallel. The base class semaphore is acquired before
+    do_process_update, so it is left unbounded here: an update queued behind
+    its own user's long /bc must not hold one of the global slots.
+    """
+
+    def __init__(self, max_concurrent_updates: int = UPDATE_CONCURRENCY):
+        super().__init__(sys.maxsize)
+        self.limit = max(1, max_concurrent_updates)
+        self._slots = asyncio.Semaphore(self.limit)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._waiters: Dict[int, int] = {}
+        self.running = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.processed = 0
+        self.total_wait = 0.0
+
+    async def initialize(self) -> None:
+        """Nothing to allocate"""
+
+    async def shutdown(self) -> None:
+        """Log the queue statistics"""
+        logger.info(f"Update processor stats: {self.stats()}")
+
+    def _acquire_lock(self, key: int) -> asyncio.Lock:
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def _release_lock(self, key: int):
+        # Drop the lock once nobody else holds or waits for it
+        self._waiters[key] -= 1
+        if self._waiters[key] == 0:
+            del self._waiters[key]
+            del self._locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Wait for the user's turn and a global slot, then run the handlers"""
+        key = update_key(update)
+        queued_at = time.monotonic()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        lock = self._acquire_lock(key) if key is not None else None
+        started = False
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                async with self._slots:
+                    started = True
+                    self.queued -= 1
+                    waited = time.monotonic() - queued_at
+                    self.total_wait += waited
+                    if waited >= SLOW_WAIT_WARNING:
+                        logger.warning(f"Update for {key} waited {waited:.1f}s ({self.queued} still queued)")
+                    self.running += 1
+                    try:
+                        await coroutine
+                    finally:
+                        self.running -= 1
+                        self.processed += 1
+            finally:
+                if lock is not None:
+                    lock.release()
+        finally:
+            if not started:
+                # Cancelled while still waiting (shutdown); the coroutine never ran
+                self.queued -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+            if lock is not None:
+                self._release_lock(key)
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of the processor counters"""
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "processed": self.processed,
+            "avg_wait": round(self.total_wait / self.processed, 3) if self.processed else 0.0,
+        }
@@ -0,0 +1,63 @@
+"""
+Lazy access to the user-account auto-join subsystem
+Keeps Telethon and its TL schema out of bot startup until a private invite actually needs them
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+USER_CONFIG_FILE = 'user_telegram_config.json'
+
+_module = None
+_load_lock = asyncio.Lock()
+
+def load_user_config(config_file: str = USER_CONFIG_FILE) -> Dict:
+    """Load the user account credentials (api_id, api_hash, phone)"""
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading user account config: {e}")
+    return {}
+
+def is_user_configured(config: Dict = None) -> bool:
+    """Check the credentials without importing Telethon"""
+    config = load_user_config() if config is None else config
+    return bool(config.get('api_id') and config.get('api_hash') and config.get('phone'))
+
+def is_loaded() -> bool:
+    """Whether hybrid_autojoin has been imported"""
+    return _module is not None
+
+async def get_hybrid_autojoin():
+    """
+    Import hybrid_autojoin on first use and return its global instance
+
+    The import (Telethon, its TL schema, the membership index) runs in a
+    worker thread so the event loop keeps serving other updates meanwhile.
+
+    Returns:
+        HybridAutoJoin: The shared instance
+    """
+    global _module
+    if _module is None:
+        async with _load_lock:
+            if _module is None:
+                started = time.perf_counter()
+                module = await asyncio.to_thread(importlib.import_module, "hybrid_autojoin")
+                _module = module
+                logger.info(f"User-account subsystem loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return _module.hybrid_autojoin
+
+async def close():
+    """Disconnect the user client if the subsystem was ever loaded"""
+    if _module is not None:
+        await _module.hybrid_autojoin.close()
@@ -15,7 +15,13 @@ from telethon.tl.functions.messages import ImportChatInviteRequest
 from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
 from telethon.errors import FloodWaitError, UserAlreadyParticipantError
 from telethon.errors import InviteHashExpiredError, InviteHashInvalidError
-import re
+from chat_storage import chat_storage, migrate_joined_groups
+from join_queue import JoinJobQueue, JoinScheduler
+from join_pacer import join_pacer
+from membership_index import membership_index, entity_info
+from utils import parse_invite_link
+from session_store import SESSION_NAME, open_session
+from telethon.utils import get_peer_id
 
 # Setup logging
 logging.basicConfig(
@@ -35,10 +41,13 @@ class UserAutoJoin:
     
     def __init__(self):
         self.client = None
-        self.session_file = 'user_session'
+        self.session_file = SESSION_NAME
         self.config_file = 'user_config.json'
-        self.joined_groups_file = 'joined_groups.json'
         self.config = self.load_config()
+        self.job_queue = JoinJobQueue()
+        
+        # joined_groups.json lama digabung sekali ke chat storage
+        migrate_joined_groups()
         
     def load_config(self) -> Dict:
         """Load konfigurasi user"""
@@ -55,37 +64,10 @@ class UserAutoJoin:
         with open(self.config_file, 'w') as f:
             json.dump(config, f, indent=2)
     
-    def load_joined_groups(self) -> List[Dict]:
-        """Load daftar group yang sudah diikuti"""
-        if os.path.exists(self.joined_groups_file):
-            try:
-                with open(self.joined_groups_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
-    
-    def save_joined_groups(self, groups: List[Dict]):
-        """Simpan daftar group yang sudah diikuti"""
-        with open(self.joined_groups_file, 'w') as f:
-            json.dump(groups, f, indent=2)
-    
     def extract_invite_hash(self, invite_link: str) -> Optional[str]:
-        """Ekstrak hash dari invite link"""
-        # Pattern untuk berbagai format invite link
-        patterns = [
-            r'https://t\.me/\+([A-Za-z0-9_-]+)',
-            r'https://t\.me/joinchat/([A-Za-z0-9_-]+)',
-            r'https://telegram\.me/joinchat/([A-Za-z0-9_-]+)',
-            r't\.me/\+([A-Za-z0-9_-]+)',
-            r'joinchat/([A-Za-z0-9_-]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, invite_link)
-            if match:
-                return match.group(1)
-        return None
+        """Ekstrak hash dari invite link (None jika bukan link private)"""
+        parsed_link = parse_invite_link(invite_link)
+        return parsed_link.value if parsed_link.is_private else None
     
     async def setup_client(self) -> bool:
         """Setup Telegram client dengan kredensial user"""
@@ -123,7 +105,7 @@ class UserAutoJoin:
             
             # Buat client
             self.client = TelegramClient(
-                self.session_file,
+                open_session(self.session_file),
                 self.config['api_id'],
                 self.config['api_hash']
             )
@@ -150,6 +132,10 @@ class UserAutoJoin:
             print(f"📱 Username: @{me.username or 'tidak ada'}")
             print(f"🆔 User ID: {me.id}")
             
+            # Bangun/muat index keanggotaan, lalu ikuti event ChatAction
+            await membership_index.attach(self.client)
+            print(f"📚 Index keanggotaan: {len(membership_index)} group/channel")
+            
             return True
             
         except Exception as e:
@@ -177,7 +163,10 @@ class UserAutoJoin:
             
             # Join menggunakan ImportChatInviteRequest
             try:
+                # Tunggu slot dari pacer adaptif sebelum request join
+                await join_pacer.wait()
                 updates = await self.client(ImportChatInviteRequest(invite_hash))
+                join_pacer.record_success()
                 
                 # Ambil info group dari hasil
                 chat = None
@@ -193,6 +182,7 @@ class UserAutoJoin:
                         'participants_count': getattr(chat, 'participants_count', 0),
                         'joined_at': int(time.time())
                     }
+                    membership_index.add(get_peer_id(chat), invite_hash, entity_info(chat))
                     
                     logger.info(f"Successfully joined: {chat.title} (ID: {chat.id})")
                     print(f"✅ Berhasil bergabung ke: {chat.title}")
@@ -225,6 +215,8 @@ class UserAutoJoin:
                 
             except FloodWaitError as e:
                 result['error'] = f"Rate limit, tunggu {e.seconds} detik"
+                result['flood_wait'] = e.seconds
+                join_pacer.record_flood(e.seconds)
                 logger.warning(f"Rate limited for {e.seconds} seconds")
                 print(f"⏳ Rate limit! Tunggu {e.seconds} detik")
                 
@@ -235,53 +227,55 @@ class UserAutoJoin:
         
         return result
     
-    async def join_multiple_groups(self, invite_links: List[str], delay: int = 30) -> List[Dict]:
-        """Join ke multiple groups dengan delay"""
-        results = []
-        joined_groups = self.load_joined_groups()
+    async def join_multiple_groups(self, invite_links: List[str], delay: Optional[float] = None) -> List[Dict]:
+        """
+        Join ke multiple groups lewat antrian persisten
         
-        print(f"\n🚀 Memulai auto-join ke {len(invite_links)} group")
-        print(f"⏱️ Delay antar join: {delay} detik")
+        Link dimasukkan ke join_jobs.db lalu diproses scheduler. Jarak antar
+        join diatur pacer adaptif (join_pacer); `delay` hanya dipakai sebagai
+        batas bawah tambahan jika diisi operator. FloodWait dijadwalkan ulang
+        sesuai e.seconds, dan job yang belum selesai dilanjutkan setelah restart.
+        """
+        added = self.job_queue.add(invite_links)
+        
+        counts = self.job_queue.counts()
+        print(f"\n🚀 Memulai auto-join: {added} link baru/diulang, "
+              f"{counts['pending'] + counts['retry']} job di antrian")
+        if delay:
+            print(f"⏱️ Delay minimal antar join: {delay:g} detik (pacer adaptif bisa memperlebar)")
+        else:
+            print(f"⏱️ Jarak antar join diatur pacer adaptif (saat ini {join_pacer.interval:.0f} detik)")
         print("=" * 50)
         
-        for i, link in enumerate(invite_links, 1):
-            print(f"\n[{i}/{len(invite_links)}] Processing: {link}")
-            
-            # Join group
-            result = await self.join_group(link)
-            results.append(result)
+        def on_result(job: Dict, result: Dict):
+            link = job['link']
+            print(f"\n[job {job['id']}] {link}")
             
-            # Simpan jika berhasil
-            if result['success'] and result['group_info']:
-                # Cek apakah sudah ada di daftar
-                existing = next((g for g in joined_groups if g.get('link') == link), None)
-                if not existing:
-                    group_data = result['group_info'].copy()
-                    group_data['link'] = link
-                    joined_groups.append(group_data)
-                    self.save_joined_groups(joined_groups)
-            
-            # Delay sebelum join berikutnya
-            if i < len(invite_links):
-                print(f"⏳ Waiting {delay} seconds before next join...")
-                await asyncio.sleep(delay)
+            # Simpan jika berhasil (dedupe O(1) lewat index invite hash)
+            group_info = result['group_info']
+            if result['success'] and group_info and group_info['id'] != 'unknown':
+                if not chat_storage.is_invite_stored(link) and not chat_storage.is_chat_stored(group_info['id']):
+                    chat_storage.add_chat(
+                        chat_id=group_info['id'],
+                        chat_title=group_info['title'],
+                        chat_type=group_info['type'],
+                        invite_link=link,
+                        participants_count=group_info.get('participants_count')
+                    )
         
-        return results
+        scheduler = JoinScheduler(self.job_queue, self.join_group, min_interval=delay or 0)
+        return await scheduler.run(on_result)
     
     async def get_my_groups(self) -> List[Dict]:
-        """Dapatkan daftar group yang sudah diikuti"""
+        """
+        Dapatkan daftar group yang sudah diikuti
+        
+        Dijawab dari index keanggotaan lokal; crawl dialog penuh hanya
+        dilakukan saat index belum pernah disinkronkan atau sudah kedaluwarsa.
+        """
         try:
-            groups = []
-            async for dialog in self.client.iter_dialogs():
-                if dialog.is_group or dialog.is_channel:
-                    groups.append({
-                        'id': dialog.id,
-                        'title': dialog.title,
-                        'type': 'channel' if dialog.is_channel else 'group',
-                        'username': getattr(dialog.entity, 'username', None),
-                        'participants_count': getattr(dialog.entity, 'participants_count', 0)
-                    })
-            return groups
+            await membership_index.attach(self.client)
+            return membership_index.get_chats()
         except Exception as e:
             logger.error(f"Error getting groups: {e}")
             return []
@@ -290,6 +284,12 @@ class UserAutoJoin:
         """Tutup client"""
         if self.client:
             await self.client.disconnect()
+        self.job_queue.close()
+
+def read_delay() -> Optional[float]:
+    """Tanya delay minimal antar join; kosong berarti hanya pacer adaptif"""
+    value = input("Delay minimal antar join (detik, kosongkan untuk pacer adaptif): ").strip()
+    return float(value) if value else None
 
 async def main():
     """Main function untuk testing"""
@@ -309,9 +309,10 @@ async def main():
             print("1. Join single group")
             print("2. Join multiple groups")
             print("3. Lihat groups yang sudah diikuti")
-            print("4. Keluar")
+            print("4. Lanjutkan antrian join yang tertunda")
+            print("5. Keluar")
             
-            choice = input("\nPilih menu (1-4): ").strip()
+            choice = input("\nPilih menu (1-5): ").strip()
             
             if choice == '1':
                 link = input("Masukkan invite link: ").strip()
@@ -333,7 +334,7 @@ async def main():
                         links.append(link)
                 
                 if links:
-                    delay = int(input("Delay antar join (detik, default 30): ") or "30")
+                    delay = read_delay()
                     results = await auto_join.join_multiple_groups(links, delay)
                     
                     success_count = sum(1 for r in results if r['success'])
@@ -349,6 +350,16 @@ async def main():
                     print("❌ Tidak ada grup yang diikuti")
             
             elif choice == '4':
+                counts = auto_join.job_queue.counts()
+                print(f"\n📋 Antrian: {counts['pending']} pending, {counts['retry']} retry, "
+                      f"{counts['done']} selesai, {counts['failed']} gagal")
+                if counts['pending'] or counts['retry']:
+                    delay = read_delay()
+                    results = await auto_join.join_multiple_groups([], delay)
+                    success_count = sum(1 for r in results if r['success'])
+                    print(f"\n📊 Hasil: {success_count}/{len(results)} berhasil")
+            
+            elif choice == '5':
                 break
             
             else:
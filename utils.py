@@ -5,10 +5,76 @@ Contains validation and helper functions with improved invite link handling
 
 import re
 import logging
-from typing import Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+INVITE_PRIVATE = "private"
+INVITE_PUBLIC = "public"
+INVITE_INVALID = "invalid"
+
+INVALID_LINK_MESSAGE = "Format link tidak valid. Gunakan format: https://t.me/+abc123, https://t.me/joinchat/abc123, https://t.me/username, atau @username"
+
+# One pattern for every supported format, compiled once:
+#   https://t.me/+hash, https://t.me/joinchat/hash (and telegram.me, with or
+#   without scheme), https://t.me/username, @username, username
+_INVITE_LINK_RE = re.compile(
+    r'(?:(?:https?://)?(?:t|telegram)\.me/'
+    r'(?:(?:\+|joinchat/)(?P<hash>[a-zA-Z0-9_-]+)|(?P<url_username>[a-zA-Z0-9_]+))'
+    r'|@?(?P<username>[a-zA-Z0-9_]+))'
+)
+
+class InviteLink(NamedTuple):
+    """Parsed Telegram link"""
+    kind: str
+    value: Optional[str]
+    link: str
+    
+    @property
+    def is_valid(self) -> bool:
+        return self.kind != INVITE_INVALID
+    
+    @property
+    def is_private(self) -> bool:
+        return self.kind == INVITE_PRIVATE
+    
+    @property
+    def is_public(self) -> bool:
+        return self.kind == INVITE_PUBLIC
+    
+    @property
+    def normalized(self) -> Optional[str]:
+        """Canonical https://t.me/... form, None for invalid links"""
+        if self.kind == INVITE_PRIVATE:
+            return f"https://t.me/+{self.value}"
+        if self.kind == INVITE_PUBLIC:
+            return f"https://t.me/{self.value}"
+        return None
+
+def parse_invite_link(link: str) -> InviteLink:
+    """
+    Classify a Telegram link in a single regex pass
+    
+    Args:
+        link (str): Invite link, t.me URL, @username or username
+        
+    Returns:
+        InviteLink: kind is INVITE_PRIVATE (value = invite hash),
+            INVITE_PUBLIC (value = username) or INVITE_INVALID (value = None)
+    """
+    if not link or not isinstance(link, str):
+        return InviteLink(INVITE_INVALID, None, link or "")
+    
+    link = link.strip()
+    match = _INVITE_LINK_RE.fullmatch(link)
+    if not match:
+        return InviteLink(INVITE_INVALID, None, link)
+    
+    invite_hash = match.group('hash')
+    if invite_hash:
+        return InviteLink(INVITE_PRIVATE, invite_hash, link)
+    return InviteLink(INVITE_PUBLIC, match.group('url_username') or match.group('username'), link)
+
 def validate_telegram_invite_link(link: str) -> Tuple[bool, Optional[str]]:
     """
     Validate if the provided link is a valid Telegram invite link
@@ -22,46 +88,14 @@ def validate_telegram_invite_link(link: str) -> Tuple[bool, Optional[str]]:
     if not link or not isinstance(link, str):
         return False, "Link tidak boleh kosong"
     
-    # Remove whitespace and common prefixes
-    link = link.strip()
+    if parse_invite_link(link).is_valid:
+        return True, None
     
-    # Telegram invite link patterns (updated and more comprehensive)
-    patterns = [
-        # New format invite links
-        r'^https?://t\.me/\+[a-zA-Z0-9_-]+$',
-        r'^https?://telegram\.me/\+[a-zA-Z0-9_-]+$',
-        
-        # Old format invite links
-        r'^https?://t\.me/joinchat/[a-zA-Z0-9_-]+$',
-        r'^https?://telegram\.me/joinchat/[a-zA-Z0-9_-]+$',
-        
-        # Username/channel format
-        r'^https?://t\.me/[a-zA-Z0-9_][a-zA-Z0-9_]*$',
-        r'^https?://telegram\.me/[a-zA-Z0-9_][a-zA-Z0-9_]*$',
-        
-        # Direct username format (without http)
-        r'^@[a-zA-Z0-9_][a-zA-Z0-9_]*$',
-        
-        # Username only format
-        r'^[a-zA-Z0-9_][a-zA-Z0-9_]*$',
-    ]
-    
-    # Check each pattern
-    for pattern in patterns:
-        if re.match(pattern, link):
-            logger.info(f"Valid invite link format detected: {link}")
-            return True, None
-    
-    # Additional validation for edge cases
-    if link.startswith('t.me/') or link.startswith('telegram.me/'):
-        # Try with https prefix
-        return validate_telegram_invite_link(f"https://{link}")
-    
-    return False, "Format link tidak valid. Gunakan format: https://t.me/+abc123, https://t.me/joinchat/abc123, https://t.me/username, atau @username"
+    return False, INVALID_LINK_MESSAGE
 
 def extract_invite_hash(link: str) -> Optional[str]:
     """
-    Extract invite hash from Telegram invite link
+    Extract invite hash (or username for public links) from Telegram link
     
     Args:
         link (str): The invite link
@@ -69,36 +103,7 @@ def extract_invite_hash(link: str) -> Optional[str]:
     Returns:
         Optional[str]: The invite hash or None if not found
     """
-    if not link:
-        return None
-    
-    # Pattern to extract hash from different link formats
-    patterns = [
-        r'https?://t\.me/\+([a-zA-Z0-9_-]+)',
-        r'https?://t\.me/joinchat/([a-zA-Z0-9_-]+)',
-        r'https?://telegram\.me/joinchat/([a-zA-Z0-9_-]+)',
-        r'https?://telegram\.me/\+([a-zA-Z0-9_-]+)',
-        r'https?://t\.me/([a-zA-Z0-9_][a-zA-Z0-9_]*)',
-        r'https?://telegram\.me/([a-zA-Z0-9_][a-zA-Z0-9_]*)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, link)
-        if match:
-            hash_value = match.group(1)
-            logger.info(f"Extracted hash from link: {hash_value}")
-            return hash_value
-    
-    # Handle direct username formats
-    if link.startswith('@'):
-        return link[1:]
-    
-    # Handle plain username
-    if re.match(r'^[a-zA-Z0-9_][a-zA-Z0-9_]*$', link):
-        return link
-    
-    logger.warning(f"Could not extract hash from link: {link}")
-    return None
+    return parse_invite_link(link).value
 
 def normalize_invite_link(link: str) -> str:
     """
@@ -113,19 +118,65 @@ def normalize_invite_link(link: str) -> str:
     if not link:
         return link
     
-    link = link.strip()
+    return parse_invite_link(link).normalized or link.strip()
+
+def invite_key(link: Optional[str]) -> Optional[str]:
+    """
+    Normalised lookup key of an invite link
+    
+    Args:
+        link (str): Invite link in any format parse_invite_link accepts (t.me URL,
+            @username or username); a bare private hash is not recognised
+        
+    Returns:
+        Optional[str]: Invite hash (private) or username (public), None if unparseable
+    """
+    if not link:
+        return None
+    
+    parsed_link = parse_invite_link(link)
+    return parsed_link.value if parsed_link.is_valid else None
+
+# Separators allowed between links in bulk input (lines, spaces, CSV cells)
+_LINK_LIST_SPLIT_RE = re.compile(r'[\s,;"\']+')
+
+def parse_link_list(text: str) -> Tuple[List[InviteLink], int, int]:
+    """
+    Extract Telegram links from free text or CSV content
     
-    # Handle different formats
-    if link.startswith('@'):
-        return f"https://t.me/{link[1:]}"
-    elif re.match(r'^[a-zA-Z0-9_][a-zA-Z0-9_]*$', link):
-        return f"https://t.me/{link}"
-    elif link.startswith('t.me/'):
-        return f"https://{link}"
-    elif link.startswith('telegram.me/'):
-        return f"https://{link}"
+    Only tokens that look like links (t.me / telegram.me URLs or @username)
+    are considered, so CSV headers and other words are ignored. Links are
+    deduplicated by their normalized form, keeping the original order.
     
-    return link
+    Args:
+        text (str): Multi-line message or file content
+        
+    Returns:
+        Tuple[List[InviteLink], int, int]: (unique valid links, invalid count, duplicate count)
+    """
+    links = []
+    seen = set()
+    invalid_count = 0
+    duplicate_count = 0
+    
+    for token in _LINK_LIST_SPLIT_RE.split(text or ""):
+        lowered = token.lower()
+        if not (token.startswith('@') or 't.me/' in lowered or 'telegram.me/' in lowered):
+            continue
+        
+        parsed_link = parse_invite_link(token)
+        if not parsed_link.is_valid:
+            invalid_count += 1
+            continue
+        
+        if parsed_link.normalized in seen:
+            duplicate_count += 1
+            continue
+        
+        seen.add(parsed_link.normalized)
+        links.append(parsed_link)
+    
+    return links, invalid_count, duplicate_count
 
 def log_join_attempt(user_id: int, username: str, link: str, success: bool, error_msg: str = None):
     """
@@ -191,7 +242,13 @@ def format_help_message() -> str:
 /start - Memulai bot dan menampilkan pesan selamat datang
 /help - Menampilkan pesan bantuan ini
 /join [link] - Bergabung ke grup/channel menggunakan invite link
+/join [link1] [link2] ... - Bulk join (satu link per baris)
 /bc [teks] - Broadcast pesan ke semua grup/channel
+/bc status [id] - Lihat progres broadcast
+/bc resume [id] - Lanjutkan broadcast yang terputus
+/bc pruned - Chat yang dihapus/dipindahkan otomatis
+/jobs - Lihat broadcast/bulk join yang berjalan di latar belakang
+/cancel [id] - Batalkan job
 /list - Menampilkan daftar grup/channel yang telah diikuti bot
 
 **Cara menggunakan:**
@@ -202,6 +259,9 @@ def format_help_message() -> str:
    `/join https://t.me/username`
    `/join @username`
 
+   Bulk join: kirim /join diikuti banyak link (satu per baris),
+   atau upload file .txt/.csv berisi link.
+
 **2. Broadcast pesan:**
    `/bc Halo semua! Ini adalah pesan broadcast.`
 
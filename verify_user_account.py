@@ -7,6 +7,7 @@ import json
 import os
 from telethon import TelegramClient
 from telethon.errors import SessionPasswordNeededError
+from session_store import open_session
 
 async def verify_user_account():
     """Verifikasi dan setup user account"""
@@ -24,7 +25,7 @@ async def verify_user_account():
     try:
         # Buat client
         client = TelegramClient(
-            'user_session',
+            open_session(),
             config['api_id'],
             config['api_hash']
         )
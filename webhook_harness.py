@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local webhook test harness: end-to-end handler latency in webhook mode
+Starts a fake Bot API server, runs main.py with BOT_MODE=webhook against it,
+POSTs recorded updates to the webhook and times each until the bot's reply
+Run: python webhook_harness.py [updates.json] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from tornado.httpserver import HTTPServer
+from tornado.web import Application, RequestHandler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BOT_TOKEN = "123456:HARNESS"
+REPLY_TIMEOUT = 15.0
+
+# Used when no recorded updates are given; every one of them gets a reply
+SAMPLE_UPDATES = [
+    {"message": {"text": "/start", "entities": [{"type": "bot_command", "offset": 0, "length": 6}]}},
+    {"message": {"text": "/help", "entities": [{"type": "bot_command", "offset": 0, "length": 5}]}},
+    {"message": {"text": "/list", "entities": [{"type": "bot_command", "offset": 0, "length": 5}]}},
+    {"message": {"text": "halo"}},
+]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class FakeBotApi:
+    """Minimal Bot API: answers every method and reports chat replies"""
+
+    def __init__(self):
+        self.webhook_set = asyncio.Event()
+        self.replies = {}
+        self.calls = []
+        self._message_id = 0
+
+    def reply_event(self, key) -> asyncio.Event:
+        return self.replies.setdefault(str(key), asyncio.Event())
+
+    def handle(self, method: str, params: dict):
+        self.calls.append(method)
+        if method == "getMe":
+            return {"id": 123456, "is_bot": True, "first_name": "Harness", "username": "harness_bot",
+                    "can_join_groups": True, "can_read_all_group_messages": False,
+                    "supports_inline_queries": False}
+        if method == "setWebhook":
+            self.webhook_set.set()
+            return True
+        if method in ("sendMessage", "editMessageText"):
+            self.reply_event(params.get("chat_id")).set()
+            self._message_id += 1
+            return {"message_id": self._message_id, "date": int(time.time()),
+                    "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                    "text": params.get("text", "")}
+        if method == "answerCallbackQuery":
+            self.reply_event(params.get("callback_query_id")).set()
+        return True
+
+    def make_app(self) -> Application:
+        api = self
+
+        class MethodHandler(RequestHandler):
+            def post(self, token, method):
+                params = {key: self.get_body_argument(key) for key in self.request.body_arguments}
+                if self.request.headers.get("Content-Type", "").startswith("application/json") and self.request.body:
+                    params.update(json.loads(self.request.body))
+                self.set_header("Content-Type", "application/json")
+                self.write(json.dumps({"ok": True, "result": api.handle(method, params)}))
+
+        return Application([(r"/bot([^/]+)/(\w+)", MethodHandler)])
+
+def prepare_updates(updates: list, repeat: int) -> list:
+    """Give every update a unique update_id and chat so replies can be matched"""
+    prepared = []
+    for n in range(repeat):
+        for i, update in enumerate(updates):
+            update = json.loads(json.dumps(update))
+            uid = n * len(updates) + i + 1
+            update["update_id"] = uid
+            chat_id = 100000 + uid
+            user = {"id": chat_id, "is_bot": False, "first_name": "Harness", "username": f"harness{uid}"}
+            if "message" in update:
+                message = update["message"]
+                message.setdefault("message_id", uid)
+                message.setdefault("date", int(time.time()))
+                message["chat"] = {"id": chat_id, "type": "private"}
+                message["from"] = user
+                key = chat_id
+            elif "callback_query" in update:
+                query = update["callback_query"]
+                query["id"] = str(uid)
+                query["from"] = user
+                query.setdefault("chat_instance", str(uid))
+                key = query["id"]
+            else:
+                continue
+            prepared.append((key, update))
+    return prepared
+
+async def run(updates: list, repeat: int):
+    api = FakeBotApi()
+    api_port, webhook_port = free_port(), free_port()
+    server = HTTPServer(api.make_app())
+    server.listen(api_port, "127.0.0.1")
+
+    secret = secrets.token_urlsafe(24)
+    workdir = tempfile.mkdtemp(prefix="webhook-harness-")
+    env = dict(
+        os.environ,
+        BOT_TOKEN=BOT_TOKEN,
+        BOT_MODE="webhook",
+        BOT_API_BASE_URL=f"http://127.0.0.1:{api_port}/bot",
+        WEBHOOK_URL=f"http://127.0.0.1:{webhook_port}",
+        WEBHOOK_PATH="telegram",
+        WEBHOOK_SECRET=secret,
+        WEBHOOK_LISTEN="127.0.0.1",
+        PORT=str(webhook_port),
+        PYTHONUNBUFFERED="1",
+    )
+    print(f"Bot working directory: {workdir}")
+    bot = subprocess.Popen([sys.executable, os.path.join(HERE, "main.py")], cwd=workdir, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{webhook_port}/telegram"
+    latencies = []
+    try:
+        await asyncio.wait_for(api.webhook_set.wait(), 60)
+        async with httpx.AsyncClient() as client:
+            # Wait for the webhook server itself to accept connections
+            for _ in range(100):
+                try:
+                    await client.get(url)
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+
+            response = await client.post(url, json={"update_id": 0},
+                                         headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+            print(f"Wrong secret token -> HTTP {response.status_code}")
+
+            for key, update in prepare_updates(updates, repeat):
+                replied = api.reply_event(key)
+                started = time.perf_counter()
+                response = await client.post(url, json=update,
+                                             headers={"X-Telegram-Bot-Api-Secret-Token": secret})
+                if response.status_code != 200:
+                    print(f"update {update['update_id']}: HTTP {response.status_code}")
+                    continue
+                try:
+                    await asyncio.wait_for(replied.wait(), REPLY_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print(f"update {update['update_id']}: no reply within {REPLY_TIMEOUT:.0f}s")
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        bot.send_signal(signal.SIGINT)
+        try:
+            bot.wait(15)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+        server.stop()
+
+    if not latencies:
+        print("❌ No update was answered")
+        sys.exit(1)
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"Updates answered: {len(latencies)}")
+    print(f"Latency ms - p50: {statistics.median(latencies):.1f}, p95: {p95:.1f}, max: {latencies[-1]:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("updates", nargs="?", help="JSON file with a list of recorded updates")
+    parser.add_argument("--repeat", type=int, default=5, help="Times to replay the update list")
+    args = parser.parse_args()
+
+    updates = SAMPLE_UPDATES
+    if args.updates:
+        with open(args.updates, "r", encoding="utf-8") as f:
+            updates = json.load(f)
+
+    asyncio.run(run(updates, args.repeat))
+
+if __name__ == "__main__":
+    main()